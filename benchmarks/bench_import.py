@@ -0,0 +1,59 @@
+'''
+Time of the CSV import endpoints on a synthetic cargo manifest.
+
+Usage: python benchmarks/bench_import.py [rows ...]
+'''
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_ROWS = [50000]
+# one container per this many items
+ITEMS_PER_CONTAINER = 100
+
+
+def manifests(rows, seed=0):
+    ''' (containers CSV, items CSV) in the hackathon column layout '''
+    rnd = random.Random(seed)
+    containers = ['zone,container_id,width_cm,depth_cm,height_cm'] + [
+        'Z{},C{},{},{},{}'.format(c % 10, c, rnd.choice([60, 80, 100]), rnd.choice([60, 80]), rnd.choice([60, 100]))
+        for c in range(max(rows // ITEMS_PER_CONTAINER, 1))
+    ]
+    items = ['item_id,name,width_cm,depth_cm,height_cm,mass_kg,priority,expiry_date,usage_limit,preferred_zone'] + [
+        '{},item{},{},{},{},{:.1f},{},{},{},Z{}'.format(
+            i, i % 1000, rnd.randint(5, 40), rnd.randint(5, 40), rnd.randint(5, 40), rnd.random() * 20, rnd.randint(1, 100),
+            rnd.choice(['N/A', '2025-05-20', '2026-01-01']), rnd.randint(1, 100), rnd.randint(0, 9))
+        for i in range(1, rows + 1)
+    ]
+    return '\n'.join(containers), '\n'.join(items)
+
+
+def post_csv(client, url, text):
+    ''' seconds taken and JSON response of uploading text to url '''
+    start = time.perf_counter()
+    response = client.post(url, data={'file': (io.BytesIO(text.encode()), 'manifest.csv')}, content_type='multipart/form-data')
+    return time.perf_counter() - start, response.get_json()
+
+
+if __name__ == '__main__':
+    with contextlib.redirect_stdout(io.StringIO()):
+        import main
+
+    rows = [int(r) for r in sys.argv[1:]] or DEFAULT_ROWS
+    print('{:>8} {:>12} {:>10} {:>10}'.format('rows', 'endpoint', 'imported', 'seconds'))
+    for count in rows:
+        containers, items = manifests(count)
+        for name in ('defined_containers', 'zone_wise_containers', 'item_properties'):
+            getattr(main, name).clear()
+        main.items_ids_to_place.clear()
+        client = main.app.test_client()
+        with contextlib.redirect_stdout(io.StringIO()):
+            container_seconds, container_result = post_csv(client, '/api/import/containers', containers)
+            item_seconds, item_result = post_csv(client, '/api/import/items', items)
+        print('{:>8} {:>12} {:>10} {:>10.3f}'.format(count, 'containers', container_result['containersImported'], container_seconds))
+        print('{:>8} {:>12} {:>10} {:>10.3f}'.format(count, 'items', item_result['itemsImported'], item_seconds))
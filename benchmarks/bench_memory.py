@@ -0,0 +1,67 @@
+'''
+Peak RSS of a synthetic py3dbp run over a large manifest.
+
+Every run happens in a fresh interpreter so the peaks do not mix.
+
+Usage: python benchmarks/bench_memory.py [count ...]
+'''
+import os
+import random
+import resource
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_COUNTS = [0, 100000]
+
+
+def peak_rss_mb():
+    ''' peak resident set size of this process in MB '''
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def run(count, seed=0):
+    ''' build count items and pack them into one container that fills up by weight '''
+    from py3dbp import Packer, Bin, Item
+
+    rnd = random.Random(seed)
+    packer = Packer()
+    packer.addBin(Bin(partno='bench', WHD=(200, 200, 200), max_weight=500, put_type=1))
+    for i in range(count):
+        packer.addItem(Item(
+            partno=i,
+            name='item{}'.format(i),
+            typeof='cube',
+            WHD=(rnd.randint(5, 40), rnd.randint(5, 40), rnd.randint(5, 40)),
+            weight=rnd.randint(1, 20),
+            level=100 - rnd.randint(1, 100),
+            loadbear=100,
+            updown=True,
+            color='#0000E3'))
+    packer.pack(
+        bigger_first=False,
+        distribute_items=True,
+        fix_point=False,
+        check_stable=False,
+        support_surface_ratio=0.750,
+        number_of_decimals=0
+    )
+    return len(packer.bins[0].items)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3 and sys.argv[1] == '--child':
+        placed = run(int(sys.argv[2]))
+        print('{} {:.1f}'.format(placed, peak_rss_mb()))
+        sys.exit(0)
+
+    counts = [int(c) for c in sys.argv[1:]] or DEFAULT_COUNTS
+    print('{:>8} {:>8} {:>12}'.format('items', 'placed', 'peak MB'))
+    for count in counts:
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child', str(count)],
+            check=True, capture_output=True, text=True).stdout.split()
+        print('{:>8} {:>8} {:>12}'.format(count, out[0], out[1]))
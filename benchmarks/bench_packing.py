@@ -0,0 +1,64 @@
+'''
+Packing time and fill rate versus item count for py3dbp, per pivot strategy.
+
+Usage: python benchmarks/bench_packing.py [count ...]
+'''
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from py3dbp import Packer, Bin, Item
+from py3dbp.constants import PivotStrategy
+
+DEFAULT_COUNTS = [50, 100, 200, 300, 400]
+CONTAINER_WHD = (200, 200, 200)
+
+
+def build_packer(count, seed=0):
+    ''' one container, count random cargo boxes '''
+    rnd = random.Random(seed)
+    packer = Packer()
+    packer.addBin(Bin(partno='bench', WHD=CONTAINER_WHD, max_weight=10000, put_type=1))
+    for i in range(count):
+        packer.addItem(Item(
+            partno=i,
+            name='item{}'.format(i),
+            typeof='cube',
+            WHD=(rnd.randint(5, 40), rnd.randint(5, 40), rnd.randint(5, 40)),
+            weight=rnd.randint(1, 20),
+            level=100 - rnd.randint(1, 100),
+            loadbear=100,
+            updown=True,
+            color='#0000E3'))
+    return packer
+
+
+def run(count, pivot_strategy=PivotStrategy.CORNERS):
+    ''' pack count items the way calculate_placements does, return seconds, placed count and fill '''
+    packer = build_packer(count)
+    start = time.perf_counter()
+    packer.pack(
+        bigger_first=False,
+        distribute_items=True,
+        fix_point=False,
+        check_stable=False,
+        support_surface_ratio=0.750,
+        number_of_decimals=0,
+        pivot_strategy=pivot_strategy
+    )
+    seconds = time.perf_counter() - start
+    box = packer.bins[0]
+    fill = sum(item.getVolume() for item in box.items) / box.getVolume()
+    return seconds, len(box.items), fill
+
+
+if __name__ == '__main__':
+    counts = [int(c) for c in sys.argv[1:]] or DEFAULT_COUNTS
+    print('{:>8} {:>15} {:>8} {:>7} {:>10}'.format('items', 'strategy', 'placed', 'fill', 'seconds'))
+    for count in counts:
+        for pivot_strategy in PivotStrategy.ALL:
+            seconds, placed, fill = run(count, pivot_strategy)
+            print('{:>8} {:>15} {:>8} {:>6.1%} {:>10.3f}'.format(count, pivot_strategy, placed, fill, seconds))
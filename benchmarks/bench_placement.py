@@ -0,0 +1,69 @@
+'''
+Time of calculate_placements on a many-zone manifest versus PLACEMENT_WORKERS.
+
+The worker pool is started (start_app) before the clock starts, as the server does at startup.
+Every worker count runs in a fresh interpreter.
+
+Usage: python benchmarks/bench_placement.py [workers ...]
+'''
+import contextlib
+import io
+import os
+import random
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_WORKERS = [1, 2, 4]
+ZONES = 8
+CONTAINERS_PER_ZONE = 3
+ITEMS_PER_ZONE = 300
+
+
+def manifest(seed=0):
+    ''' (containers, items) spread evenly over ZONES zones '''
+    rnd = random.Random(seed)
+    containers = [
+        {'containerId': 'C{}-{}'.format(z, c), 'zone': 'Z{}'.format(z), 'width': 100.0, 'depth': 100.0, 'height': 100.0}
+        for z in range(ZONES) for c in range(CONTAINERS_PER_ZONE)
+    ]
+    items = [
+        {'itemId': i, 'name': 'item{}'.format(i), 'width': rnd.randint(5, 40), 'depth': rnd.randint(5, 40), 'height': rnd.randint(5, 40),
+         'mass': rnd.randint(1, 20), 'priority': rnd.randint(1, 100), 'preferredZone': 'Z{}'.format(i % ZONES), 'usage_limit': 5, 'expiry_date': None}
+        for i in range(ZONES * ITEMS_PER_ZONE)
+    ]
+    return containers, items
+
+
+def run(workers):
+    ''' seconds calculate_placements takes with workers, and the items it placed '''
+    os.environ['PLACEMENT_WORKERS'] = str(workers)
+    os.environ.pop('BAS_STATE_DIR', None)
+    with contextlib.redirect_stdout(io.StringIO()):
+        import main
+        main.start_app()
+        containers, items = manifest()
+        main.record_event('containers', containers)
+        main.record_event('items', items, True)
+        start = time.perf_counter()
+        main.calculate_placements()
+        seconds = time.perf_counter() - start
+    main.close_placement_pool()
+    return seconds, len(main.current_item_state)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2 and sys.argv[1] == '--child':
+        print('{:.3f} {}'.format(*run(int(sys.argv[2]))))
+        sys.exit(0)
+
+    workers = [int(w) for w in sys.argv[1:]] or DEFAULT_WORKERS
+    print('{:>8} {:>8} {:>10}   ({} CPUs)'.format('workers', 'placed', 'seconds', os.cpu_count()))
+    for count in workers:
+        seconds, placed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child', str(count)],
+            check=True, capture_output=True, text=True, cwd=ROOT).stdout.split()
+        print('{:>8} {:>8} {:>10}'.format(count, placed, seconds))
@@ -0,0 +1,106 @@
+'''
+Startup time of main.py restoring a large stowage state from BAS_STATE_DIR.
+
+The state is written once per mode, then loaded in a fresh interpreter:
+snapshot has everything in the snapshot, wal has everything still in the write-ahead log.
+
+Usage: python benchmarks/bench_recovery.py [count ...]
+'''
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_COUNTS = [100000]
+# items per container, laid out as one 10 x 10 floor layer
+CONTAINER_ITEMS = 100
+# share of the items retrieved once after placement
+RETRIEVED_SHARE = 0.1
+
+
+def import_main(state_dir):
+    ''' main.py keeping its state in state_dir, without loading it yet '''
+    os.environ.pop('BAS_STATE_DIR', None)
+    with contextlib.redirect_stdout(io.StringIO()):
+        import main
+    main.STATE_DIR = state_dir
+    return main
+
+
+def build(state_dir, count, snapshot):
+    ''' record count placed items, some retrievals and their log entries, then snapshot them if asked '''
+    main = import_main(state_dir)
+    containers = [
+        {'containerId': 'C{}'.format(c), 'zone': 'Z{}'.format(c % 10), 'width': 100.0, 'depth': 100.0, 'height': 100.0}
+        for c in range((count + CONTAINER_ITEMS - 1) // CONTAINER_ITEMS)
+    ]
+    items = [
+        {'itemId': i, 'name': 'item{}'.format(i % 1000), 'width': 10.0, 'depth': 10.0, 'height': 10.0, 'mass': 1.0,
+         'priority': i % 100, 'preferredZone': 'Z{}'.format(i // CONTAINER_ITEMS % 10), 'usage_limit': 5, 'expiry_date': None}
+        for i in range(count)
+    ]
+    placements = []
+    for c, container in enumerate(containers):
+        placed = []
+        for i in range(c * CONTAINER_ITEMS, min((c + 1) * CONTAINER_ITEMS, count)):
+            w, d = (i % CONTAINER_ITEMS) % 10 * 10, (i % CONTAINER_ITEMS) // 10 * 10
+            placed.append({'itemId': i, 'name': items[i]['name'], 'containerId': container['containerId'], 'position': {
+                'startCoordinates': {'width': w, 'depth': d, 'height': 0},
+                'endCoordinates': {'width': w + 10, 'depth': d + 10, 'height': 10}}})
+        placements.append((container['containerId'], placed))
+    with contextlib.redirect_stdout(io.StringIO()):
+        main.record_event('containers', containers)
+        main.record_event('items', items, True)
+        main.record_event('placement_started')
+        main.record_event('placed', placements)
+        for i in range(0, count, int(1 / RETRIEVED_SHARE)):
+            entry = {'userId': 'bench', 'timestamp': '2025-01-01T00:00:00'}
+            main.add_log('retrieve', i, entry, userId='system_retrieve')
+            main.record_event('retrieved', i, entry)
+        if snapshot:
+            main.write_snapshot()
+    main.state_log['file'].close()
+
+
+def load(state_dir):
+    ''' seconds load_state takes and the events it applied '''
+    main = import_main(state_dir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        seconds, applied = main.load_state()
+    assert main.current_item_state, 'nothing was restored'
+    return seconds, applied
+
+
+def child(*args):
+    ''' run this file with args in a fresh interpreter, returns its output words '''
+    return subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child'] + [str(a) for a in args],
+        check=True, capture_output=True, text=True, cwd=ROOT).stdout.split()
+
+
+def size_mb(state_dir):
+    ''' bytes in state_dir, in MB '''
+    return sum(os.path.getsize(os.path.join(state_dir, name)) for name in os.listdir(state_dir)) / 1024 / 1024
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2 and sys.argv[1] == '--child':
+        if sys.argv[2] == 'build':
+            build(sys.argv[3], int(sys.argv[4]), sys.argv[5] == 'snapshot')
+        else:
+            print('{:.3f} {}'.format(*load(sys.argv[3])))
+        sys.exit(0)
+
+    counts = [int(c) for c in sys.argv[1:]] or DEFAULT_COUNTS
+    print('{:>8} {:>9} {:>8} {:>8} {:>10}'.format('items', 'mode', 'MB', 'events', 'load s'))
+    for count in counts:
+        for mode in ('snapshot', 'wal'):
+            with tempfile.TemporaryDirectory() as state_dir:
+                child('build', state_dir, count, mode)
+                seconds, applied = child('load', state_dir)
+                print('{:>8} {:>9} {:>8.1f} {:>8} {:>10}'.format(count, mode, size_mb(state_dir), applied, seconds))
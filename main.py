@@ -3,17 +3,65 @@ import io
 import uuid
 import datetime
 import time
+import copy
+import json
+import pickle
+import shutil
+import tempfile
+import hashlib
+import threading
+import queue
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
 from flask import (
-    Flask, request, jsonify, abort, send_file, render_template)
+    Flask, Response, request, jsonify, abort, send_file, render_template)
+import numpy as np
 import pandas as pd
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Tuple, Callable, Iterator
 from py3dbp import Packer, Bin, Item
 from werkzeug.exceptions import HTTPException
+from werkzeug.serving import is_running_from_reloader
 
 
 # --- Flask App Setup ---
 app = Flask(__name__)
 CONT_MAX_WEIGHT = 10000
+# Worker processes used to pack zones in parallel, 1 packs them one after another in this process.
+# Only worth raising on a host with a spare core per worker, see benchmarks/bench_placement.py
+PLACEMENT_WORKERS = int(os.environ.get('PLACEMENT_WORKERS', 1))
+# py3dbp options every placement packs with
+PACK_OPTIONS = {
+    "bigger_first": False,
+    "distribute_items": True,
+    "fix_point": False,
+    "check_stable": False,
+    "support_surface_ratio": 0.750,
+    "number_of_decimals": 0,
+}
+# Number of placement requests kept to answer identical ones again, least recently used dropped first
+PLACEMENT_CACHE_SIZE = int(os.environ.get('PLACEMENT_CACHE_SIZE', 128))
+# Finished placement jobs kept for status requests
+PLACEMENT_JOBS_KEPT = 100
+# Finished placement jobs, the most recent ones, that keep their placements too, older ones keep only their status
+PLACEMENT_JOB_RESULTS_KEPT = 10
+# Longest a job status request may long-poll, in seconds
+PLACEMENT_JOB_MAX_WAIT = 60
+# Rows a streaming CSV import reads, adds to the state and reports at a time
+IMPORT_CHUNK_ROWS = int(os.environ.get('BAS_IMPORT_CHUNK_ROWS', 10000))
+# Columns an items CSV needs, under either set of names, and a containers CSV
+ITEM_COLUMNS = ['itemId', 'name', 'width', 'depth', 'height', 'mass', 'priority']
+ITEM_ALTERNATIVE_COLUMNS = ['item_id', 'name', 'width_cm', 'depth_cm', 'height_cm', 'mass_kg', 'priority']
+CONTAINER_COLUMNS = ['zone','container_id', 'width_cm', 'depth_cm', 'height_cm']
+# Columns along the width and the depth of a container in the retrieval index
+RETRIEVAL_GRID_CELLS = 8
+# Directory the state is kept in across restarts (snapshot plus write-ahead log), unset keeps it in memory only
+STATE_DIR = os.environ.get('BAS_STATE_DIR')
+# Size in bytes the write-ahead log may grow to before the state is snapshotted and the log started over
+STATE_SNAPSHOT_BYTES = int(os.environ.get('BAS_STATE_SNAPSHOT_BYTES', 64 * 1024 * 1024))
+# fsync the write-ahead log after every event, nothing acknowledged is lost on power failure but writes are slower
+STATE_FSYNC = os.environ.get('BAS_STATE_FSYNC', '0') == '1'
 # --- In-Memory State Simulation ---
 # Simple demo state. Not constant across restarts
 # Structure: {containerId: ContainerDefinitionDict}
@@ -30,6 +78,23 @@ item_properties: Dict[str, Dict[str, Any]] = {}
 
 empty_container_ids = [] #for undocking and second placement 
 
+# Structure: {PlacementRequestHash: {itemId: (containerId, position), etc}}, see run_placement
+placement_cache: "OrderedDict[str, Dict[Any, Tuple[str, Dict[str, Any]]]]" = OrderedDict()
+placement_cache_stats: Dict[str, int] = {"hits": 0, "misses": 0}
+placement_cache_lock = threading.Lock()
+
+# Worker processes zones are packed in when PLACEMENT_WORKERS > 1, started once and kept, see get_placement_pool
+placement_pool: Optional[ProcessPoolExecutor] = None
+placement_pool_lock = threading.Lock()
+
+# Placements change all the state above, only one runs at a time
+placement_lock = threading.Lock()
+# Queued placement jobs run one after another on this thread
+placement_executor = ThreadPoolExecutor(max_workers=1)
+# Structure: {jobId: PlacementJobDict}, see api_placement_jobs
+placement_jobs: Dict[str, Dict[str, Any]] = {}
+placement_jobs_changed = threading.Condition()
+
 # #We need a list of container IDs for keeping track of containers which have been packed(partially or fully) with items, so that if more items arrive in shipment, only those containers not in this list are considered?
 # filled_container_ids = [] #['conta', 'contb', etc.]
 # Structure: {"itemId": {"total_uses": int, "retrievals": [{"userId": str, "timestamp": str}, ...]}} #here total uses is len(retrievals)?
@@ -41,6 +106,25 @@ activity_log: List[Dict[str, Any]] = []
 
 #For keeping track of depleted and expired items and not having to run iterations everytime api/waste/identify is hit
 waste_items: List[Dict[str, Any]] = [] #[{"itemId": 01, "reason": "expired", etc}, etc]
+
+# Every change to the state above goes through record_event, which writes it to the write-ahead log in STATE_DIR first
+# Structure: {"seq": last event number, "file": open log or None, "size": bytes in the log, "loaded": bool, "snapshotted": bool, "snapshotting": bool}
+state_log: Dict[str, Any] = {"seq": 0, "file": None, "size": 0, "loaded": False, "snapshotted": False, "snapshotting": False}
+state_log_lock = threading.Lock()
+# Writes the snapshots record_event asks for, one at a time
+state_snapshot_executor = ThreadPoolExecutor(max_workers=1)
+
+# Lookups over current_stowage_state for searches, kept in step with it by index_container and index_placed_item
+# PlacementRef = (containerRank, index in the container's list, containerId, PlacedItemDict), containerRank is the container's place in current_stowage_state
+# Structure: {int(itemId): [PlacementRef, ...]}
+retrieval_index_ids: Dict[Any, List[Tuple[int, int, str, Dict[str, Any]]]] = {}
+# Structure: {name: [PlacementRef, ...]}
+retrieval_index_names: Dict[str, List[Tuple[int, int, str, Dict[str, Any]]]] = {}
+# Structure: {containerId: {"rank": int, "cellSize": (width, depth), "cells": {(i, j): [index in the container's list, ...]}, "dag": BlockingGraphDict or None}}
+# Each container's floor is split into a grid of RETRIEVAL_GRID_CELLS x RETRIEVAL_GRID_CELLS columns, every item is listed under the columns its (width, depth) footprint covers
+# BlockingGraphDict = {"direct": {index: (index, ...)}, "closure": {index: (index, ...)}}, the items blocking an item directly and all the items to move to reach it,
+# filled in as searches need them and dropped whenever the container's contents change, see retrieval_closures
+retrieval_index_containers: Dict[str, Dict[str, Any]] = {}
 # --- Utility Functions ---
 def add_log(actionType: str, itemId: str, details: Dict, userId: Optional[str] = "system"):
     """Adds an entry to the activity log."""
@@ -52,7 +136,7 @@ def add_log(actionType: str, itemId: str, details: Dict, userId: Optional[str] =
         "itemId": itemId,
         "details": details,
     }
-    activity_log.append(log_entry)
+    record_event("log", log_entry)
     print(f"LOG: {log_entry}") # Print log to console for debugging
 
 def parse_iso_datetime(date_string: Optional[str]) -> Optional[datetime.datetime]:
@@ -68,6 +152,149 @@ def parse_iso_datetime(date_string: Optional[str]) -> Optional[datetime.datetime
     except ValueError:
         return None # Invalid format
 
+def convert_column(column: pd.Series, values: List[Any], convert: Callable[[Any], Any]) -> Tuple[List[Any], Dict[int, Exception]]:
+    """
+    convert (float or int) applied to every cell of a read_csv column, values being the cells as iterrows gives them.
+    Columns read_csv already typed as numbers are converted in one go, cells that could fail or come out differently one at a time.
+    Returns the converted values (None where it failed) and {row position: exception raised} of the cells that failed.
+    """
+    converted = None
+    slow = range(len(values))
+    if column.dtype.kind in 'iu':
+        converted = column.tolist() if convert is int else column.to_numpy(dtype=float).tolist()
+        slow = []
+    elif column.dtype.kind == 'f':
+        array = column.to_numpy(dtype=float)
+        fast = np.isfinite(array)
+        if convert is int:
+            fast &= np.abs(array) < 2 ** 63
+            converted = np.where(fast, np.trunc(array), 0).astype(np.int64).tolist()
+        else:
+            converted = array.tolist()
+        slow = np.flatnonzero(~fast).tolist()
+    if converted is None:
+        converted = [None] * len(values)
+    errors = {}
+    for i in slow:
+        try:
+            converted[i] = convert(values[i])
+        except Exception as e:
+            #only raised if the row is imported, see row_error
+            converted[i] = None
+            errors[i] = e
+    return converted, errors
+
+def row_error(i: int, column_errors: List[Dict[int, Exception]]) -> Optional[Exception]:
+    """
+    The first of column_errors (from convert_column, in the order the row's columns are converted) row i has, None if it has none.
+    Raises it unless it is a ValueError or TypeError, which a row by row import reports for the row and carries on.
+    """
+    for errors in column_errors:
+        if i in errors:
+            if not isinstance(errors[i], (ValueError, TypeError)):
+                raise errors[i]
+            return errors[i]
+    return None
+
+def parse_iso_column(values: List[Any]) -> List[Optional[datetime.datetime]]:
+    """parse_iso_datetime of every value that is not None, each distinct value parsed once."""
+    parsed: Dict[Tuple[type, Any], Optional[datetime.datetime]] = {}
+    dates = []
+    for value in values:
+        if value is None:
+            dates.append(None)
+            continue
+        key = (type(value), value)
+        if key not in parsed:
+            parsed[key] = parse_iso_datetime(value)
+        dates.append(parsed[key])
+    return dates
+
+def import_containers_frame(df: pd.DataFrame) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], int]:
+    """
+    The containers of a containers CSV read by read_csv, converted column by column.
+    Rows with sizes that are not numbers are reported as {"row": CSV line, "message"}, rows whose container_id is already defined
+    or came earlier in the file are skipped, same as converting the rows one by one.
+    Returns (container dicts to add, errors, rows skipped).
+    """
+    columns = list(df.columns)
+    cells = dict(zip(columns, df.values.T.tolist())) #as iterrows gives them
+    zones = [str(zone) for zone in cells['zone']]
+    sizes = [convert_column(df[column], cells[column], float) for column in ('width_cm', 'depth_cm', 'height_cm')]
+    containers_list = []
+    errors = []
+    skipped = 0
+    imported_ids = set()
+    for i, (index, row) in enumerate(zip(df.index, zip(*(cells[column] for column in columns)))):
+        error = row_error(i, [size_errors for _, size_errors in sizes])
+        if error is not None:
+            errors.append({"row": index + 2, "message": f"Invalid numeric data: {error}"})
+            continue
+        container_dict = dict(zip(columns, row))
+        container_dict['zone'] = zones[i]
+        container_dict.pop('width_cm')
+        container_dict['width'] = sizes[0][0][i]
+        container_dict.pop('depth_cm')
+        container_dict['depth'] = sizes[1][0][i]
+        container_dict.pop('height_cm')
+        container_dict['height'] = sizes[2][0][i]
+        container_dict['containerId'] = container_dict.pop('container_id')
+        if defined_containers.get(container_dict['containerId']) or container_dict['containerId'] in imported_ids:
+            skipped += 1
+            continue
+        containers_list.append(container_dict)
+        imported_ids.add(container_dict['containerId'])
+    return containers_list, errors, skipped
+
+def import_items_frame(df: pd.DataFrame) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], int]:
+    """
+    The items of an items CSV read by read_csv, with its columns renamed to itemId, width, depth, height and mass, converted column by column.
+    Rows whose itemId is already known or came earlier in the file are skipped, rows with values that do not convert are reported
+    as {"row": CSV line, "message"}, same as converting the rows one by one.
+    Returns (item dicts to add, errors, rows skipped).
+    """
+    columns = list(df.columns)
+    missing = df.isna().values.T.tolist()
+    # as iterrows gives them, None where pandas read nothing
+    cells = {
+        column: [None if empty else value for value, empty in zip(values, column_missing)]
+        for column, values, column_missing in zip(columns, df.values.T.tolist(), missing)
+    }
+    names = [str(name) for name in cells['name']]
+    numbers = [(column, convert_column(df[column], cells[column], float)) for column in ('width', 'depth', 'height', 'mass')]
+    numbers.append(('priority', convert_column(df['priority'], cells['priority'], int)))
+    preferred_zones = [str(zone) for zone in cells['preferred_zone']] if 'preferred_zone' in cells else None
+    if 'usage_limit' in cells:
+        usage_limits, usage_errors = convert_column(df['usage_limit'], cells['usage_limit'], int)
+        #empty usage limits stay None
+        numbers.append(('usage_limit', (usage_limits, {i: e for i, e in usage_errors.items() if cells['usage_limit'][i] is not None})))
+    expiry_dates = parse_iso_column(cells['expiry_date']) if 'expiry_date' in cells else None
+
+    items_list = []
+    errors = []
+    skipped = 0
+    imported_ids = set()
+    item_ids = cells['itemId']
+    for i, (index, row) in enumerate(zip(df.index, zip(*(cells[column] for column in columns)))):
+        if item_properties.get(item_ids[i]) or item_ids[i] in imported_ids:
+            skipped += 1
+            continue
+        error = row_error(i, [column_errors for _, (_, column_errors) in numbers])
+        if error is not None:
+            errors.append({"row": index + 2, "message": f"Invalid numeric/integer data: {error}"})
+            continue
+        item_dict = dict(zip(columns, row))
+        item_dict['name'] = names[i]
+        for column, (values, _) in numbers:
+            item_dict[column] = values[i]
+        item_dict.pop('preferred_zone', None)
+        item_dict['preferredZone'] = preferred_zones[i] if preferred_zones is not None else 'default_zone'
+        if expiry_dates is not None:
+            item_dict['expiry_date'] = expiry_dates[i]
+        items_list.append(item_dict)
+        imported_ids.add(item_ids[i])
+    return items_list, errors, skipped
+
 def is_item_expired(item_id: str, current_time: datetime.datetime) -> bool:
     """Checks if an item is expired based on its properties."""
     props = item_properties.get(item_id)
@@ -86,16 +313,157 @@ def is_item_depleted(item_id: str) -> bool:
 
 # --- Core Logic Functions (Placeholders - *** REPLACE WITH YOUR ALGORITHMS ***) ---
 
-def calculate_placements() -> Dict:
+def pack_containers(containers: List[Tuple[Any, Tuple, List]], items: List[Tuple[Any, Dict[str, Any]]], time_limit: Optional[float] = None) -> Tuple[List[Tuple[Any, List[Dict[str, Any]]]], List[Any], float]:
+    """
+    Packs items into containers with py3dbp.
+    Only takes and returns plain data, so it can run in a worker process.
+    containers: [(containerId, (width, height, depth), [(PlacedItemDict, mass), ...]), ...], the items already in the container stay where they are
+    items: [(itemId, ItemPropertiesDict), ...]
+    time_limit: seconds py3dbp may pack for, items it has not got to by then are left unplaced
+    Returns [(containerId, [PlacedItemDict, ...]), ...] for the new items in packing order, the ids of the items left unplaced,
+    and the share of the packing done (1 unless time_limit ran out).
+    """
+    packer = Packer()
+    already_placed = set() #id() of the Items rebuilt from placed items, so they are not reported again
+    for container_id, WHD, placed_items in containers:
+        box = Bin(
+            partno=container_id,
+            WHD=WHD,
+            max_weight=CONT_MAX_WEIGHT,
+            put_type=1
+        )
+        for placed_item, mass in placed_items:
+            start = placed_item['position']['startCoordinates']
+            end = placed_item['position']['endCoordinates']
+            item = Item(
+                partno=placed_item['itemId'],
+                name=placed_item['name'],
+                typeof='cube',
+                WHD=(end['width'] - start['width'], end['height'] - start['height'], end['depth'] - start['depth']),
+                weight=mass,
+                level=0,
+                loadbear=100,
+                updown=False,
+                color='#0000E3')
+            box.putPlacedItem(item, (start['width'], start['height'], start['depth']))
+            already_placed.add(id(item))
+        packer.addBin(box)
+    for item_id, item in items:
+        packer.addItem(Item(
+            partno=item_id,
+            name=item.get('name', 'unknown'),
+            typeof='cube',
+            WHD=(item['width'], item['height'], item['depth']),
+            weight=item.get('mass', 0),
+            level=100-int(item.get('priority', 0)),
+            loadbear=100,  # Default load-bearing capacity
+            updown=True,  # Allow flipping, otherwise problem in placing some items(like item ID 172 in sample)
+            color='#0000E3')  # Default color
+        )
+
+    # Perform packing
+    packer.pack(**PACK_OPTIONS, time_limit=time_limit)
+
+    placements = []
+    for box in packer.bins:
+        placed = []
+        for item in box.items:
+            if id(item.item) in already_placed:
+                continue
+            start_pos = (item.position[0], item.position[1], item.position[2])
+            new_WHD = item.getDimension() #[W, H, D] of the rotated item, as it will depend on the rotation type of the item placed. 
+            end_pos = (item.position[0] + new_WHD[0], item.position[1] + new_WHD[1], item.position[2] + new_WHD[2])
+            position = {
+                "startCoordinates": {
+                    "width": float(start_pos[0]),
+                    "height": float(start_pos[1]),
+                    "depth": float(start_pos[2])
+                },
+                "endCoordinates": {
+                    "width": float(end_pos[0]),
+                    "height": float(end_pos[1]),
+                    "depth": float(end_pos[2])
+                }
+            }
+            placed.append({'itemId': item.partno,'name':item.name,'containerId': box.partno,'position':position})
+        placements.append((box.partno, placed))
+    #same as the last container's unfitted items, plus the items a time limit cut off
+    unplaced_items_ids = [item.partno for item in packer.unfit_items] if packer.bins else []
+    return placements, unplaced_items_ids, packer.progress
+
+def pack_containers_until(containers: List[Tuple[Any, Tuple, List]], items: List[Tuple[Any, Dict[str, Any]]], deadline: Optional[float] = None) -> Tuple[List[Tuple[Any, List[Dict[str, Any]]]], List[Any], float]:
+    """
+    pack_containers with the time left before deadline (a time.time()) when the job starts, so jobs queued behind others only get what remains.
+    """
+    time_limit = None if deadline is None else max(deadline - time.time(), 0)
+    return pack_containers(containers, items, time_limit)
+
+def get_placement_pool() -> ProcessPoolExecutor:
+    """
+    The pool of PLACEMENT_WORKERS processes pack_jobs fans zones out to, started on first use and kept for every placement after.
+    Workers are spawned rather than forked, a fork of the threaded server would copy in locks other threads hold at that moment.
+    """
+    global placement_pool
+    with placement_pool_lock:
+        if placement_pool is None:
+            placement_pool = ProcessPoolExecutor(max_workers=PLACEMENT_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+        return placement_pool
+
+def close_placement_pool(executor: Optional[ProcessPoolExecutor] = None) -> None:
+    """Shuts the placement pool down (only if it is still executor, when given), the next placement starts a new one."""
+    global placement_pool
+    with placement_pool_lock:
+        if placement_pool is None or (executor is not None and placement_pool is not executor):
+            return
+        placement_pool, executor = None, placement_pool
+    executor.shutdown(wait=False, cancel_futures=True)
+
+def pack_jobs(jobs: List[Tuple[List, List]], deadline: Optional[float] = None, on_result: Optional[Callable[[int, Tuple], None]] = None) -> List[Tuple[List, List, float]]:
+    """
+    Runs pack_containers on every (containers, items) job, results in job order.
+    The jobs are fanned out to the placement pool when there is more than one and PLACEMENT_WORKERS > 1.
+    All of them stop at deadline (a time.time()), see pack_containers_until.
+    on_result(job index, result) is called as each job's result comes in.
+    """
+    results: List[Any] = []
+    if PLACEMENT_WORKERS > 1 and len(jobs) > 1:
+        executor = get_placement_pool()
+        try:
+            for i, result in enumerate(executor.map(pack_containers_until, *zip(*jobs), [deadline] * len(jobs))):
+                results.append(result)
+                if on_result:
+                    on_result(i, result)
+        except BrokenProcessPool:
+            #a worker died, the next placement starts a new pool
+            close_placement_pool(executor)
+            raise
+    else:
+        for i, job in enumerate(jobs):
+            results.append(pack_containers_until(*job, deadline))
+            if on_result:
+                on_result(i, results[-1])
+    return results
+
+def calculate_placements(incremental: bool = False, time_limit: Optional[float] = None, on_progress: Optional[Callable[[Any, int, int, bool], None]] = None, on_placed: Optional[Callable[[str, List[Dict[str, Any]]], None]] = None) -> Tuple[float, float, bool]:
     """
     ***Placement Algorithm (3D Bin Packing) using py3dbp(modified)***
-    
+    The placements are recorded as events, so a restart reloads them instead of packing again.
+    Zones share no containers, so with PLACEMENT_WORKERS > 1 they are packed side by side in the placement pool.
+    With incremental, containers that already hold items are packed too, the new items go into the space around the placed ones.
+    With time_limit (seconds), packing stops when it runs out and the items not placed by then stay unplaced.
+    It is one deadline for the whole placement, the zones and the leftover pass packed after others get what is left of it.
+    on_progress(zone, items placed, items to place, done) is called for every zone before and after it is packed, zone None is the leftover pass.
+    on_placed(containerId, [PlacedItemDict, ...]) is called for every container once its items are final: as soon as its zone is packed,
+    or after the leftover pass for containers the zone left empty. The list is the container's in current_stowage_state, copy it to keep it.
+    Returns the time taken, the item-weighted share of the zones packed (1 unless time_limit ran out) and whether time_limit ran out.
     """
     global current_stowage_state
     global items_ids_to_place
     global current_item_state
     global usage_log
     # global filled_container_ids
+    current = time.time()
+    deadline = None if time_limit is None else current + time_limit
     print("Calculating Placements...")
     # print(current_stowage_state)
     # print(defined_containers)
@@ -107,97 +475,66 @@ def calculate_placements() -> Dict:
         if preferred_zone not in preferred_zone_items_dict:
             preferred_zone_items_dict[preferred_zone] = []
         preferred_zone_items_dict[preferred_zone].append(itemId)
-    items_ids_to_place.clear()
+    record_event("placement_started")
     total=0
     unplaced_items_ids = []
     global empty_container_ids
-    current = time.time()
     '''
     This section handles first placement in preferred zones
     '''
+    zone_jobs = [] #[(containers, items), etc], one per zone, in zone order
+    job_zones = [] #zone of each job
     for zone, container_ids in zone_wise_containers.items():
-        packer = Packer()
+        containers = []
         # Create bins for each container in the preferred zone
         for container_id in container_ids:
             #check if previosuly filled
-            if len(current_stowage_state.get(container_id, []))>0:
+            placed_items = current_stowage_state.get(container_id, [])
+            if len(placed_items)>0 and not incremental:
                 continue
             container = defined_containers.get(container_id)
             if not container:
                 continue
-            packer.addBin(Bin(
-                partno=container_id,
-                WHD=(container.get('width'), container.get('height'), container.get('depth')),
-                max_weight=CONT_MAX_WEIGHT,
-                put_type=1
-            ))
+            placed_items = [(placed_item, item_properties.get(placed_item['itemId'], {}).get('mass', 0)) for placed_item in placed_items]
+            containers.append((container_id, (container.get('width'), container.get('height'), container.get('depth')), placed_items))
 
         # Add items to the packer for the current zone
         if preferred_zone_items_dict.get(zone) is None:
             continue
+        items = []
         for item_id in preferred_zone_items_dict.get(zone):
             item = item_properties.get(item_id)
             if not item:
                 continue
-            packer.addItem(Item(
-                partno=item_id,
-                name=item.get('name', 'unknown'),
-                typeof='cube',
-                WHD=(item['width'], item['height'], item['depth']),
-                weight=item.get('mass', 0),
-                level=100-int(item.get('priority', 0)),
-                loadbear=100,  # Default load-bearing capacity
-                updown=True,  # Allow flipping, otherwise problem in placing some items(like item ID 172 in sample)
-                color='#0000E3')  # Default color
-            )
-
-        # Perform packing
-        packer.pack(
-            bigger_first=False,
-            distribute_items=True,
-            fix_point=False,
-            check_stable=False,
-            support_surface_ratio=0.750,
-            number_of_decimals=0
-        )
-        
-        # Collect placements from the packing results
-        if packer.bins:
-            last_box = packer.bins[-1]
-        else:
+            items.append((item_id, item))
+        if not containers:
             print("No bins available in packer.")
-        for box in packer.bins:
-            current_stowage_state[box.partno] = [] #First make sure the key as the contianer id is always added, doesnt matter if number of items 0 or sum else
-            if len(box.items) == 0:
-                empty_container_ids.append(box.partno)
-                # print(f"ID:{box.partno} Added to possible container IDs")
-            # print(":::::::::::", box.string())
-            # print("FITTED ITEMS:")
-            for item in box.items:
-                start_pos = (item.position[0], item.position[1], item.position[2])
-                new_WHD = item.getDimension() #[W, H, D] of the rotated item, as it will depend on the rotation type of the item placed. 
-                end_pos = (item.position[0] + new_WHD[0], item.position[1] + new_WHD[1], item.position[2] + new_WHD[2])
-                position = {
-                    "startCoordinates": {
-                        "width": float(start_pos[0]),
-                        "height": float(start_pos[1]),
-                        "depth": float(start_pos[2])
-                    },
-                    "endCoordinates": {
-                        "width": float(end_pos[0]),
-                        "height": float(end_pos[1]),
-                        "depth": float(end_pos[2])
-                    }
-                }
-                item_to_add = {'itemId': item.partno,'name':item.name,'containerId': box.partno,'position':position}
-                current_stowage_state[box.partno].append(item_to_add)
-                current_item_state[item.partno] = item_to_add
-                usage_log[item.partno] = {"total_uses": 0, "retrievals":[]}
-                # print("partno : ",item.partno)
-                total+=1
-            if box == last_box:
-                for unplaced_item in box.unfitted_items:
-                    unplaced_items_ids.append(unplaced_item.partno)
+        zone_jobs.append((containers, items))
+        job_zones.append(zone)
+        if on_progress:
+            on_progress(zone, 0, len(items), False)
+
+    def zone_packed(i: int, result: Tuple) -> None:
+        #recorded zone by zone, so the zones packed so far can be reported while the rest are packing
+        if result[0]:
+            record_event("placed", result[0])
+        if on_placed:
+            for container_id, _ in result[0]:
+                if current_stowage_state[container_id]:
+                    on_placed(container_id, current_stowage_state[container_id])
+        if on_progress:
+            on_progress(job_zones[i], sum(len(placed) for _, placed in result[0]), len(zone_jobs[i][1]), True)
+
+    # Perform packing, fanning the zones out to the placement pool when there is more than one
+    zone_results = pack_jobs(zone_jobs, deadline, zone_packed)
+    #item-weighted share of the zones packed before the time limit
+    zone_items = sum(len(items) for _, items in zone_jobs)
+    progress = sum(result[2] * len(items) for result, (_, items) in zip(zone_results, zone_jobs)) / zone_items if zone_items else 1
+
+    # Collect placements from the packing results
+    total += sum(len(placed) for placements, _, _ in zone_results for _, placed in placements)
+    for _, zone_unplaced_ids, _ in zone_results:
+        unplaced_items_ids.extend(zone_unplaced_ids)
                     
     '''
     This section will handle the unplaced items, will place them in any container with number of fitted items = 0
@@ -205,76 +542,38 @@ def calculate_placements() -> Dict:
     print("Placing unplaced items in empty containers...")
     # print("Possible Container Ids: ", possible_container_ids)
     # print("Number of Unplaced items' Ids: ", len(unplaced_items_ids))
-    packer = Packer()
-    for container_id in empty_container_ids:
+    containers = []
+    for container_id in dict.fromkeys(empty_container_ids):
+        #ids left over from an earlier call may have been filled since, or listed twice
+        if len(current_stowage_state.get(container_id, []))>0:
+            continue
         container = defined_containers.get(container_id)
         if not container:
             continue
-        packer.addBin(Bin(
-            partno=container_id,
-            WHD=(container.get('width'), container.get('height'), container.get('depth')),
-            max_weight=CONT_MAX_WEIGHT,
-            put_type=1
-        ))
-    empty_container_ids.clear()
+        containers.append((container_id, (container.get('width'), container.get('height'), container.get('depth')), []))
+    record_event("leftover_started")
+    items = []
     for item_id in unplaced_items_ids:
         item = item_properties.get(int(item_id))
         if not item:
             continue
-        packer.addItem(Item(
-            partno=item_id,
-            name=item.get('name', 'unknown'),
-            typeof='cube',
-            WHD=(item['width'], item['height'], item['depth']),
-            weight=item.get('mass', 0),
-            level=100-int(item.get('priority', 0)),
-            loadbear=100,  
-            updown=True,  # Allow flipping, otherwise problem in placing some items(like item ID 172 in sample)
-            color='#0000E3')  
-            )
-    packer.pack(
-            bigger_first=False,
-            distribute_items=True,
-            fix_point=False,
-            check_stable=False,
-            support_surface_ratio=0.750,
-            number_of_decimals=0
-        )
-    if packer.bins:
-        last_box = packer.bins[-1]
-    for box in packer.bins:
-        # print(":::::::::::", box.string())
-        # print("FITTED ITEMS:")
-        if len(box.items)==0:
-            empty_container_ids.append(box.partno)
-        for item in box.items:
-            start_pos = (item.position[0], item.position[1], item.position[2])
-            new_WHD = item.getDimension() #[W, H, D] of the rotated item, as it will depend on the rotation type of the item placed. 
-            end_pos = (item.position[0] + new_WHD[0], item.position[1] + new_WHD[1], item.position[2] + new_WHD[2])
-            position = {
-                "startCoordinates": {
-                    "width": float(start_pos[0]),
-                    "height": float(start_pos[1]),
-                    "depth": float(start_pos[2])
-                },
-                "endCoordinates": {
-                    "width": float(end_pos[0]),
-                    "height": float(end_pos[1]),
-                    "depth": float(end_pos[2])
-                }
-            }
-            item_to_add = {'itemId': item.partno,'name':item.name,'containerId': box.partno,'position':position}
-            current_stowage_state[box.partno].append(item_to_add)
-            current_item_state[item.partno] = item_to_add
-            usage_log[item.partno] = {"total_uses": 0, "retrievals":[]}
-
-            # print("partno : ",item.partno)
-            total+=1
-        if box == last_box:
-            print("UNPLACED ITEM IDS")
-            for unfitted_item in box.unfitted_items:
-                print(unfitted_item.partno)
-            print("********************")
+        items.append((item_id, item))
+    if on_progress:
+        on_progress(None, 0, len(items), False)
+    placements, still_unplaced_ids, leftover_progress = pack_jobs([(containers, items)], deadline)[0]
+    if on_progress:
+        on_progress(None, sum(len(placed) for _, placed in placements), len(items), True)
+    timed_out = progress < 1 or leftover_progress < 1
+    record_event("leftover_placed", placements)
+    if on_placed:
+        for container_id, _ in placements:
+            on_placed(container_id, current_stowage_state[container_id])
+    total += sum(len(placed) for _, placed in placements)
+    if placements:
+        print("UNPLACED ITEM IDS")
+        for unfitted_item_id in still_unplaced_ids:
+            print(unfitted_item_id)
+        print("********************")
     
     end = time.time()
     
@@ -287,92 +586,244 @@ def calculate_placements() -> Dict:
     print("Time taken to place the items: ", end-current)
     print(f"Total items placed: {total}\n")
     
-    return end-current
+    return end-current, progress, timed_out
+
+def retrieval_cells(cell_size: Tuple[float, float], position: Dict[str, Any]) -> List[Tuple[int, int]]:
+    """Columns of the retrieval grid the (width, depth) footprint of position covers."""
+    start, end = position['startCoordinates'], position['endCoordinates']
+    return [
+        (i, j)
+        for i in range(int(start['width'] // cell_size[0]), int(end['width'] // cell_size[0]) + 1)
+        for j in range(int(start['depth'] // cell_size[1]), int(end['depth'] // cell_size[1]) + 1)
+    ]
+
+def index_container(container_id: str) -> None:
+    """Adds a container of current_stowage_state to the retrieval index, call it when the container is added to the state."""
+    if container_id in retrieval_index_containers:
+        return
+    container = defined_containers.get(container_id, {})
+    retrieval_index_containers[container_id] = {
+        "rank": len(retrieval_index_containers),
+        "cellSize": (
+            max(float(container.get('width', 0) or 0) / RETRIEVAL_GRID_CELLS, 1.0),
+            max(float(container.get('depth', 0) or 0) / RETRIEVAL_GRID_CELLS, 1.0)
+        ),
+        "cells": {},
+        "dag": None
+    }
 
-def find_best_retrieval_option(search_key: str, search_type: str) -> Dict:
+def index_placed_item(container_id: str, item_dict: Dict[str, Any], position: Optional[int] = None) -> None:
+    """Adds an item of current_stowage_state[container_id] to the retrieval index, by default the one just appended."""
+    index_container(container_id)
+    container_index = retrieval_index_containers[container_id]
+    if position is None:
+        position = len(current_stowage_state[container_id]) - 1
+    ref = (container_index["rank"], position, container_id, item_dict)
+    try:
+        item_key = int(item_dict.get('itemId'))
+    except (TypeError, ValueError):
+        item_key = item_dict.get('itemId')
+    retrieval_index_ids.setdefault(item_key, []).append(ref)
+    retrieval_index_names.setdefault(item_dict.get('name'), []).append(ref)
+    for cell in retrieval_cells(container_index["cellSize"], item_dict['position']):
+        container_index["cells"].setdefault(cell, []).append(position)
+    container_index["dag"] = None
+
+def find_blocking_items(container_id: str, target_positions: List[Dict[str, Any]]) -> List[List[int]]:
     """
+    Items of the container directly in the way of an item at each of target_positions, as indexes in the container's list, in list order:
+    the ones ending at or below its start height whose (width, depth) rectangle intersects its own.
+    Only the grid columns under the targets are looked at, each column once for all of them.
     """
-    print(f"Finding best retrieval for {search_type}: {search_key}")
-    found_items_options = []
-    for containerId, items_list_for_container in current_stowage_state.items():
-        for item_dict in items_list_for_container:
-            matches = False
-            if (search_type == 'itemId') and int(item_dict.get('itemId')) == int(search_key):
-                matches = True
-            elif search_type == 'itemName' and item_dict.get('name') == search_key:
-                matches = True
-            if matches:
-                found_items_options.append({
-                    "item": {
-                        "itemId": item_dict.get('itemId'),
-                        "name": item_dict.get('name'),
-                        "containerId": containerId,
-                        "zone": defined_containers.get(containerId, {}).get('zone', 'Unknown'),
-                        "position": item_dict.get('position', {})
-                    },
-                    "startCoordinates": item_dict.get('position', {}).get('startCoordinates', {})
-                })
-
-    if not found_items_options:
-        return {"found": False, "item": None, "retrievalSteps": []}
+    container_index = retrieval_index_containers.get(container_id)
+    if container_index is None:
+        return [[] for _ in target_positions]
+    items_list_for_container = current_stowage_state[container_id]
+    columns: Dict[Tuple[int, int], List[int]] = {}
+    blocking_items = []
+    for target_position in target_positions:
+        candidates = set()
+        for cell in retrieval_cells(container_index["cellSize"], target_position):
+            if cell not in columns:
+                columns[cell] = container_index["cells"].get(cell, [])
+            candidates.update(columns[cell])
+        target_item_width_min:float = target_position['startCoordinates']['width']
+        target_item_depth_min:float = target_position['startCoordinates']['depth']
+        target_item_height_min:float = target_position['startCoordinates']['height']
+        target_item_width_max:float = target_position['endCoordinates']['width']
+        target_item_depth_max:float = target_position['endCoordinates']['depth']
+        target_blocking_items = []
+        for position in sorted(candidates):
+            itemDict = items_list_for_container[position]
+            if itemDict['position']['endCoordinates']['height'] > target_item_height_min:
+                continue
+            #Item and target as rectangles (width_min, depth_min) to (width_max, depth_max), touching edges do not block
+            start, end = itemDict['position']['startCoordinates'], itemDict['position']['endCoordinates']
+            if (start['width']>=target_item_width_max) or (end['width']<=target_item_width_min) or (end['depth']<=target_item_depth_min) or (start['depth']>=target_item_depth_max):
+                continue
+            target_blocking_items.append(position)
+        blocking_items.append(target_blocking_items)
+    return blocking_items
+
+def retrieval_closures(container_id: str, positions: List[int]) -> List[Tuple[int, ...]]:
+    """
+    Every item that has to be moved to reach each item at positions (indexes in the container's list): the items blocking it,
+    the items blocking those and so on, in the order to move them, nearest the open face (lowest start height) first.
+    Blockers always end at or below the start of what they block, so the graph has no cycles.
+    Uses and fills the container's cached blocking graph.
+    """
+    container_index = retrieval_index_containers[container_id]
+    if container_index["dag"] is None:
+        container_index["dag"] = {"direct": {}, "closure": {}}
+    direct, closure = container_index["dag"]["direct"], container_index["dag"]["closure"]
+    items_list_for_container = current_stowage_state[container_id]
+
+    def add_direct(new_positions: List[int]) -> None:
+        new_positions = [position for position in dict.fromkeys(new_positions) if position not in direct]
+        blocking_items = find_blocking_items(container_id, [items_list_for_container[position]['position'] for position in new_positions])
+        for position, blocking in zip(new_positions, blocking_items):
+            direct[position] = tuple(blocking)
+
+    #direct blockers of the requested items in one pass, the ones further down as the walk reaches them
+    add_direct(positions)
+    for position in positions:
+        stack = [position]
+        while stack:
+            current = stack[-1]
+            if current in closure:
+                stack.pop()
+                continue
+            if current not in direct:
+                add_direct([current])
+            missing = [blocker for blocker in direct[current] if blocker not in closure]
+            if missing:
+                stack.extend(missing)
+                continue
+            moved = set(direct[current])
+            for blocker in direct[current]:
+                moved.update(closure[blocker])
+            closure[current] = tuple(sorted(moved, key=lambda i: (items_list_for_container[i]['position']['startCoordinates']['height'], i)))
+            stack.pop()
+    return [closure[position] for position in positions]
+
+def find_retrieval_target(search_key: str, search_type: str, minimize: str = 'moves') -> Optional[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+    """
+    The placed copy of the item matching search_key (an itemId or a name, per search_type) that disturbs the fewest other items,
+    and the items to move to reach it, in order. None if nothing matches.
+    minimize 'moves' picks the copy with the fewest items to move, then the lightest total mass of them, 'mass' the lightest first, then the fewest.
+    Remaining ties go to the smallest start (width, height, depth), then the first in the stowage state.
+    The target is the "item" of a search result: itemId, name, containerId, zone and position.
+    """
+    refs = []
+    if search_type == 'itemId':
+        if retrieval_index_ids:
+            refs = retrieval_index_ids.get(int(search_key), [])
+    elif search_type == 'itemName':
+        refs = retrieval_index_names.get(search_key, [])
+    if not refs:
+        return None
 
-    # Select the option with minimum startCoordinates (based on width, height, depth)
-    best_option = min(
-        found_items_options,
-        key=lambda x: (
-            x['startCoordinates'].get('width', float('inf')),
-            x['startCoordinates'].get('height', float('inf')),
-            x['startCoordinates'].get('depth', float('inf'))
+    by_container: Dict[str, List[int]] = {} #{containerId: [index in the container's list, ...]}
+    for _, position, containerId, _ in refs:
+        by_container.setdefault(containerId, []).append(position)
+    moves: Dict[Tuple[str, int], Tuple[int, ...]] = {}
+    for containerId, positions in by_container.items():
+        for position, closure in zip(positions, retrieval_closures(containerId, positions)):
+            moves[(containerId, position)] = closure
+
+    def cost(ref: Tuple[int, int, str, Dict[str, Any]]) -> Tuple:
+        closure = moves[(ref[2], ref[1])]
+        items_list_for_container = current_stowage_state[ref[2]]
+        mass = sum(float(item_properties.get(items_list_for_container[i]['itemId'], {}).get('mass', 0) or 0) for i in closure)
+        start = ref[3].get('position', {}).get('startCoordinates', {})
+        disturbance = (len(closure), mass) if minimize == 'moves' else (mass, len(closure))
+        return disturbance + (
+            start.get('width', float('inf')),
+            start.get('height', float('inf')),
+            start.get('depth', float('inf')),
+            ref[0],
+            ref[1]
         )
-    )
-    item_ids_to_set_aside = []
-    pos_list = []
-    target_item_dict = best_option['item']
-    target_item_cont_id = target_item_dict['containerId']
-    target_item_width_min:float = target_item_dict['position']['startCoordinates']['width']
-    target_item_depth_min:float = target_item_dict['position']['startCoordinates']['depth']
-    target_item_height_min:float = target_item_dict['position']['startCoordinates']['height']
-    target_item_width_max:float = target_item_dict['position']['endCoordinates']['width']
-    target_item_depth_max:float = target_item_dict['position']['endCoordinates']['depth']
-    for itemDict in current_stowage_state[target_item_cont_id]:
-        current_item_height_max:float = itemDict['position']['endCoordinates']['height']
-        if  current_item_height_max <= target_item_height_min: #THis will result in a 2D rectangle intersection case.
-            current_item_width_min:float = itemDict['position']['startCoordinates']['width']
-            current_item_depth_min:float = itemDict['position']['startCoordinates']['depth']
-            current_item_width_max:float = itemDict['position']['endCoordinates']['width']
-            current_item_depth_max:float = itemDict['position']['endCoordinates']['depth']
-            #Bad logic, but keeping as a sign of learning
-            # #First possibility is current item coords(width, depth) are starting between target item coords
-            # if (target_item_width_min<=current_item_width_min<=target_item_width_max) and (target_item_depth_min<=current_item_depth_min<=target_item_depth_max):
-            #     item_ids_to_set_aside.append(item_dict['itemId'])
-            # #Second possibility is current item coords(width, depth) are ending between target item coords
-            # elif (target_item_width_min<=current_item_width_max<=target_item_width_max) and (target_item_depth_min<=current_item_depth_max<=target_item_depth_max):
-            #     item_ids_to_set_aside.append(item_dict['itemId'])
-            # #Current item coords(width, depth) both within target item coords will be covered by either of above condition
-            # #Finally, the last possibility is that target item width coords in between current item width coords  
-            
-            #Good logic
-            #Here we think of the current item now as rectangle with bounds (width_min, depth_min) to (width_max, depth_max) AND the target item as a rectangle similarly
-            #Now, it becomes easy to check for their intersections.
-            if (current_item_width_min>=target_item_width_max) or (current_item_width_max<=target_item_width_min) or (current_item_depth_max<=target_item_depth_min) or (current_item_depth_min>=target_item_depth_max):
-                #Means the item rect(width, depth) is not intersecting with target item (width, depth)
-                pass
-            else:
-                item_ids_to_set_aside.append(itemDict['itemId'])
-                pos_list.append(itemDict['position'])
+
+    _, position, containerId, item_dict = min(refs, key=cost)
+    items_list_for_container = current_stowage_state[containerId]
+    target_item_dict = {
+        "itemId": item_dict.get('itemId'),
+        "name": item_dict.get('name'),
+        "containerId": containerId,
+        "zone": defined_containers.get(containerId, {}).get('zone', 'Unknown'),
+        "position": item_dict.get('position', {})
+    }
+    return target_item_dict, [items_list_for_container[i] for i in moves[(containerId, position)]]
+
+def build_retrieval_steps(target_item_dict: Dict[str, Any], blocking_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Steps to take out the target: every blocking item set aside and put back, then the target retrieved."""
     retrieval_steps = []
     step = 0
-    for i, item_id in enumerate(item_ids_to_set_aside):
+    for i, itemDict in enumerate(blocking_items):
         step = i+1
         action = "setAside then placeBack"
+        item_id = itemDict['itemId']
         itemName = item_properties[item_id]['name']
-        position = pos_list[i]
-        retrieval_steps.append({"step":step, "action":action, "itemId":item_id, "itemName":itemName, "position":position})
+        retrieval_steps.append({"step":step, "action":action, "itemId":item_id, "itemName":itemName, "position":itemDict['position']})
     retrieval_steps.append({"step":step+1, "action":"retrieve", "itemId":target_item_dict['itemId'], "ItemName":target_item_dict['name']})
+    return retrieval_steps
 
+def find_best_retrieval_option(search_key: str, search_type: str, minimize: str = 'moves') -> Dict:
+    """
+    Finds the placed copy of the item matching search_key that needs the least moved to reach and the steps to take it out, see find_retrieval_target.
+    Uses the retrieval index and the cached blocking graphs instead of scanning the containers.
+    """
+    print(f"Finding best retrieval for {search_type}: {search_key}")
+    target = find_retrieval_target(search_key, search_type, minimize)
+    if target is None:
+        return {"found": False, "item": None, "retrievalSteps": []}
+    target_item_dict, blocking_items = target
+    return {"found": True, "item": target_item_dict, "retrievalSteps": build_retrieval_steps(target_item_dict, blocking_items)}
 
-    
-    return {"found": True, "item": best_option["item"], "retrievalSteps": retrieval_steps}
+def find_batch_retrieval_options(searches: List[Tuple[str, str]], minimize: str = 'moves') -> Tuple[List[Dict], List[Dict]]:
+    """
+    find_best_retrieval_option for every (search_key, search_type) in searches, sharing the blocking graph of each container.
+    Also returns one retrieval sequence for all of them: container by container in stowage order, targets in request order,
+    every item is set aside at most once and a target that is in the way of another is retrieved instead of set aside.
+    Returns (results in the order of searches, merged retrieval steps).
+    """
+    print(f"Finding best retrieval for {len(searches)} searches")
+    targets = [find_retrieval_target(search_key, search_type, minimize) for search_key, search_type in searches]
+    results = []
+    by_container: Dict[str, List[int]] = {} #{containerId: [index in searches, ...]}
+    for i, target in enumerate(targets):
+        if target is None:
+            results.append({"found": False, "item": None, "retrievalSteps": []})
+            continue
+        target_item_dict, blocking_items = target
+        results.append({"found": True, "item": target_item_dict, "retrievalSteps": build_retrieval_steps(target_item_dict, blocking_items)})
+        by_container.setdefault(target_item_dict['containerId'], []).append(i)
+
+    target_ids = set(targets[i][0]['itemId'] for indexes in by_container.values() for i in indexes)
+    moved_ids = set()
+    merged_steps = []
+    for containerId in sorted(by_container, key=lambda container_id: retrieval_index_containers[container_id]["rank"]):
+        for i in by_container[containerId]:
+            target_item_dict, blocking_items = targets[i]
+            for itemDict in blocking_items + [None]:
+                item_id = target_item_dict['itemId'] if itemDict is None else itemDict['itemId']
+                if item_id in moved_ids:
+                    continue
+                moved_ids.add(item_id)
+                if item_id in target_ids:
+                    merged_steps.append({"step":len(merged_steps)+1, "action":"retrieve", "itemId":item_id, "ItemName":item_properties[item_id]['name'], "containerId":containerId})
+                else:
+                    merged_steps.append({"step":len(merged_steps)+1, "action":"setAside then placeBack", "itemId":item_id, "itemName":item_properties[item_id]['name'], "containerId":containerId, "position":itemDict['position']})
+    return results, merged_steps
+
+def parse_retrieval_minimize(minimize: Optional[str]) -> str:
+    """Reads what a search should minimize, 'moves' (default) or 'mass', aborts with 400 otherwise."""
+    if minimize is None:
+        return 'moves'
+    if minimize not in ('moves', 'mass'):
+        abort(400, description="minimize must be 'moves' or 'mass'.")
+    return minimize
 
 def generate_return_plan(waste_items_to_return: List[Dict], undock_containerId: str, max_weight: float) -> Dict:
     """
@@ -420,56 +871,568 @@ def simulate_one_day(items_to_use: List, current_time: datetime.datetime) -> Tup
 current_simulated_time = datetime.datetime.now()
 
 
+# --- Persistence ---
+# Every change to the state is an event: record_event writes it to the write-ahead log, then applies it.
+# At startup load_state reads the last snapshot and applies the events logged after it, the same functions
+# applying them as when they first happened, so nothing is packed again.
+def apply_log(log_entry: Dict[str, Any]) -> None:
+    """Adds an entry to the activity log."""
+    activity_log.append(log_entry)
+
+def apply_items(items_list: List[Dict[str, Any]], skip_queued: bool) -> None:
+    """Adds items to item_properties and queues them to be placed, with skip_queued items already queued are not queued twice."""
+    queued = set(items_ids_to_place) if skip_queued else None
+    for item in items_list:
+        item_properties[item.get('itemId')] = item
+        if not skip_queued or item.get('itemId') not in queued:
+            items_ids_to_place.append(item.get('itemId'))
+            if skip_queued:
+                queued.add(item.get('itemId'))
+        else:
+            print(f"{item.get('itemId')}Already in the list to be placed")
+
+def apply_containers(containers_list: List[Dict[str, Any]]) -> None:
+    """Adds containers to defined_containers and to their zone."""
+    for container in containers_list:
+        try:
+            if container.get('zone') not in zone_wise_containers: zone_wise_containers[container.get('zone')] = []
+            #sent again, e.g. by a repeated request, it is still one bin
+            if container["containerId"] not in zone_wise_containers[container.get('zone')]:
+                zone_wise_containers[container.get('zone')].append(container["containerId"])
+            defined_containers[container["containerId"]] = container #Adding the container to defined containers.
+        except KeyError as e:
+            print(f"Error: Missing key {e} in container data.")
+
+def apply_placement_started() -> None:
+    """The queued items have been taken to be placed."""
+    items_ids_to_place.clear()
+
+def apply_placed(placements: List[Tuple[str, List[Dict[str, Any]]]]) -> None:
+    """Adds the items the zones were packed with to their containers, containers left empty are noted for the leftover pass."""
+    for container_id, placed in placements:
+        current_stowage_state.setdefault(container_id, []) #First make sure the key as the contianer id is always added, doesnt matter if number of items 0 or sum else
+        index_container(container_id)
+        for item_to_add in placed:
+            current_stowage_state[container_id].append(item_to_add)
+            index_placed_item(container_id, item_to_add)
+            current_item_state[item_to_add['itemId']] = item_to_add
+            usage_log[item_to_add['itemId']] = {"total_uses": 0, "retrievals":[]}
+        if len(current_stowage_state[container_id]) == 0:
+            empty_container_ids.append(container_id)
+
+def apply_leftover_started() -> None:
+    """The empty containers have been taken for the leftover pass."""
+    empty_container_ids.clear()
+
+def apply_leftover_placed(placements: List[Tuple[str, List[Dict[str, Any]]]]) -> None:
+    """Adds the items the leftover pass placed in empty containers, the ones still empty stay noted."""
+    for container_id, placed in placements:
+        if len(placed)==0:
+            empty_container_ids.append(container_id)
+        for item_to_add in placed:
+            current_stowage_state[container_id].append(item_to_add)
+            index_placed_item(container_id, item_to_add)
+            current_item_state[item_to_add['itemId']] = item_to_add
+            usage_log[item_to_add['itemId']] = {"total_uses": 0, "retrievals":[]}
+
+def apply_retrieved(item_id: Any, retrieval_log_entry: Dict[str, Any]) -> None:
+    """Counts a use of the item, which goes to waste once it has none left."""
+    usage_log[item_id]["total_uses"] += 1
+    usage_log[item_id]["retrievals"].append(retrieval_log_entry)
+    item_properties[item_id]["usage_limit"] -= 1 #Reducing usage Limit
+    if is_item_depleted(item_id):
+        #Updating waste item List
+        waste_item_to_add = current_item_state.get(item_id)
+        waste_item_to_add["reason"] = "Out of Uses"
+        if waste_item_to_add not in waste_items:    
+            waste_items.append(waste_item_to_add)
+
+def apply_simulated(num_days: int, items_to_be_used: List) -> Dict[str, List]:
+    """Advances the simulated time by num_days, using items_to_be_used every day. Returns the items used up and expired."""
+    global current_simulated_time
+    total_changes = {"itemsUsed": [], "itemsExpired": []}
+
+    for _ in range(num_days):
+        changes_today, new_sim_time = simulate_one_day(items_to_be_used, current_simulated_time)
+        current_simulated_time = new_sim_time # Update global time
+
+        # Aggregate changes (simple list extend)
+        total_changes["itemsUsed"].extend(
+            item for item in changes_today["itemsUsed"] if item not in total_changes["itemsUsed"]
+        )
+        total_changes["itemsExpired"].extend(
+            item for item in changes_today["itemsExpired"] if item not in total_changes["itemsExpired"]
+        )
+
+    for item_used_id in total_changes['itemsUsed']:
+        waste_item_to_add = current_item_state.get(item_used_id)
+        waste_item_to_add["reason"] = "Out of Uses"
+        if waste_item_to_add in waste_items:
+            continue
+        waste_items.append(waste_item_to_add)
+    for item_used_id in total_changes['itemsExpired']:
+        waste_item_to_add = current_item_state.get(item_used_id)
+        waste_item_to_add["reason"] = "Expired"
+        if waste_item_to_add in waste_items:
+            continue
+        waste_items.append(waste_item_to_add)
+    return total_changes
+
+STATE_EVENTS: Dict[str, Callable[..., Any]] = {
+    "log": apply_log,
+    "items": apply_items,
+    "containers": apply_containers,
+    "placement_started": apply_placement_started,
+    "placed": apply_placed,
+    "leftover_started": apply_leftover_started,
+    "leftover_placed": apply_leftover_placed,
+    "retrieved": apply_retrieved,
+    "simulated": apply_simulated,
+}
+
+def state_paths() -> Tuple[str, str]:
+    """Paths of the snapshot and the write-ahead log in STATE_DIR."""
+    return os.path.join(STATE_DIR, 'snapshot.pickle'), os.path.join(STATE_DIR, 'wal.pickle')
+
+def record_event(kind: str, *args: Any) -> Any:
+    """
+    Applies the event kind (a key of STATE_EVENTS) with args to the state, logging it first when STATE_DIR is set.
+    Everything an event does must follow from args and the state, so applying it again after a restart gives the same state.
+    Returns what applying it returns.
+    """
+    snapshot_due = False
+    #what STATE_DIR holds is loaded before anything is added to it, a state that was not would overwrite it
+    if STATE_DIR and not state_log["loaded"]:
+        load_state()
+    try:
+        with state_log_lock:
+            if STATE_DIR:
+                if not state_log["loaded"]:
+                    raise RuntimeError(f"The state kept in {STATE_DIR} was not loaded")
+                if state_log["file"] is None:
+                    #the state before the first event is kept too, the simulated time starts at the first run's clock
+                    if not state_log["snapshotted"]:
+                        save_snapshot(snapshot_bytes())
+                        state_log["snapshotted"] = True
+                        open(state_paths()[1], 'wb').close()
+                    state_log["file"] = open(state_paths()[1], 'ab')
+                    state_log["size"] = state_log["file"].tell()
+                state_log["seq"] += 1
+                record = pickle.dumps((state_log["seq"], kind, args), protocol=pickle.HIGHEST_PROTOCOL)
+                state_log["file"].write(record)
+                state_log["file"].flush()
+                if STATE_FSYNC:
+                    os.fsync(state_log["file"].fileno())
+                state_log["size"] += len(record)
+            try:
+                return STATE_EVENTS[kind](*args)
+            finally:
+                snapshot_due = bool(STATE_DIR) and state_log["size"] >= STATE_SNAPSHOT_BYTES and not state_log["snapshotting"]
+    finally:
+        #written in the background, the change is done and other changes are logged meanwhile
+        if snapshot_due:
+            state_snapshot_executor.submit(write_snapshot)
+
+def snapshot_bytes() -> bytes:
+    """The whole state, pickled."""
+    return pickle.dumps({
+        "seq": state_log["seq"],
+        "defined_containers": defined_containers,
+        "zone_wise_containers": zone_wise_containers,
+        "items_ids_to_place": items_ids_to_place,
+        "current_stowage_state": current_stowage_state,
+        "current_item_state": current_item_state,
+        "item_properties": item_properties,
+        "empty_container_ids": empty_container_ids,
+        "usage_log": usage_log,
+        "activity_log": activity_log,
+        "waste_items": waste_items,
+        "current_simulated_time": current_simulated_time,
+    }, protocol=pickle.HIGHEST_PROTOCOL)
+
+def save_snapshot(snapshot: bytes) -> None:
+    """Writes a pickled state to the snapshot file."""
+    snapshot_path = state_paths()[0]
+    os.makedirs(STATE_DIR, exist_ok=True)
+    #written aside and renamed over the old one, so a crash leaves one whole snapshot or the other
+    with open(snapshot_path + '.tmp', 'wb') as f:
+        f.write(snapshot)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(snapshot_path + '.tmp', snapshot_path)
+
+def write_snapshot() -> None:
+    """
+    Writes the whole state to the snapshot and drops the events it holds from the write-ahead log, call it without holding state_log_lock.
+    The new snapshot is built from the last one and the log by compact_state in a process of its own, so pickling the state does not hold up
+    the events logged meanwhile. The lock is only held to note how far the log goes and to cut it once the snapshot is written.
+    """
+    wal_path = state_paths()[1]
+    with state_log_lock:
+        if state_log["snapshotting"]:
+            return
+        state_log["snapshotting"] = True
+        #bytes of the log the snapshot will hold the events of
+        if state_log["file"] is not None:
+            covered = state_log["size"]
+        else:
+            covered = os.path.getsize(wal_path) if os.path.exists(wal_path) else 0
+    try:
+        process = multiprocessing.get_context('spawn').Process(target=compact_state, args=(STATE_DIR, covered))
+        process.start()
+        process.join()
+        if process.exitcode != 0:
+            print(f"Writing the snapshot failed (exit code {process.exitcode}), the write-ahead log is kept whole")
+            return
+        with state_log_lock:
+            #the events logged since are kept, a crash before the rename leaves them all in the log, to be skipped on load
+            if state_log["file"] is not None:
+                state_log["file"].close()
+            with open(wal_path, 'rb') as f:
+                f.seek(covered)
+                tail = f.read()
+            with open(wal_path + '.tmp', 'wb') as f:
+                f.write(tail)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(wal_path + '.tmp', wal_path)
+            state_log["file"] = open(wal_path, 'ab')
+            state_log["size"] = len(tail)
+    finally:
+        with state_log_lock:
+            state_log["snapshotting"] = False
+
+def compact_state(state_dir: str, covered: int) -> None:
+    """Runs in a process of its own for write_snapshot: loads the state kept in state_dir, up to byte covered of the log, and writes it as the snapshot."""
+    global STATE_DIR
+    STATE_DIR = state_dir
+    load_state(covered)
+    save_snapshot(snapshot_bytes())
+
+def load_state(until: Optional[int] = None) -> Tuple[float, int]:
+    """
+    Restores the state kept in STATE_DIR: the snapshot, then the events logged after it.
+    An event cut short by a crash at the end of the log is dropped. Events that failed when they first happened fail the same way again and are skipped.
+    With until, only the events in the first until bytes of the log are applied and the log is left as it is.
+    Otherwise the state is loaded once, later calls do nothing.
+    Returns the seconds taken and the number of events applied.
+    """
+    global current_simulated_time
+    start = time.time()
+    if not STATE_DIR:
+        return 0.0, 0
+    snapshot_path, wal_path = state_paths()
+    with state_log_lock:
+        if until is None and state_log["loaded"]:
+            return 0.0, 0
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, 'rb') as f:
+                snapshot = pickle.load(f)
+            for name in ("defined_containers", "zone_wise_containers", "current_stowage_state", "current_item_state", "item_properties", "usage_log"):
+                globals()[name].clear()
+                globals()[name].update(snapshot[name])
+            for name in ("items_ids_to_place", "empty_container_ids", "activity_log", "waste_items"):
+                globals()[name][:] = snapshot[name]
+            current_simulated_time = snapshot["current_simulated_time"]
+            state_log["seq"] = snapshot["seq"]
+            state_log["snapshotted"] = True
+            for container_id, items_list_for_container in current_stowage_state.items():
+                index_container(container_id)
+                for position, item_dict in enumerate(items_list_for_container):
+                    index_placed_item(container_id, item_dict, position)
+        applied = 0
+        if os.path.exists(wal_path):
+            with open(wal_path, 'r+b' if until is None else 'rb') as f:
+                log = f if until is None else io.BytesIO(f.read(until))
+                end = 0
+                while True:
+                    try:
+                        seq, kind, args = pickle.load(log)
+                    except EOFError:
+                        break
+                    except Exception as e:
+                        if until is not None:
+                            raise
+                        print(f"Dropping the end of the write-ahead log after byte {end}: {e}")
+                        f.truncate(end)
+                        break
+                    end = log.tell()
+                    if seq <= state_log["seq"]:
+                        continue
+                    state_log["seq"] = seq
+                    applied += 1
+                    try:
+                        STATE_EVENTS[kind](*args)
+                    except Exception as e:
+                        print(f"Event {seq} ({kind}) failed again: {e}")
+        state_log["loaded"] = until is None
+    print(f"Loaded state from {STATE_DIR}: {len(current_item_state)} placed items, {applied} logged events, in {time.time() - start:.3f} seconds")
+    return time.time() - start, applied
+
+
 # --- API Endpoints ---
 
 # --- 1. Placement ---
+def parse_placement_options(data: Dict) -> Tuple[Optional[float], bool]:
+    """Reads timeLimit and incremental from a placement request, aborts with 400 if they are invalid."""
+    # timeLimit: seconds placement may take, what is not placed by then stays unplaced
+    time_limit = data.get("timeLimit")
+    if time_limit is not None:
+        try:
+            time_limit = float(time_limit)
+        except (TypeError, ValueError):
+            abort(400, description="timeLimit must be a number of seconds.")
+    # incremental: also fill the free space of containers that already hold items
+    return time_limit, bool(data.get("incremental", False))
+
+def placement_request_key(data: Dict, incremental: bool) -> str:
+    """
+    Canonical hash of a placement request: its items and containers as sent, incremental, and the pack options.
+    """
+    placement_request = [
+        PACK_OPTIONS,
+        CONT_MAX_WEIGHT,
+        incremental,
+        data.get("items") or [],
+        data.get("containers") or [],
+    ]
+    # repr keeps e.g. numpy ints apart from strings that print the same
+    return hashlib.sha256(json.dumps(placement_request, sort_keys=True, default=repr).encode()).hexdigest()
+
+def is_placement_cached(key: str, data: Dict) -> bool:
+    """
+    Whether the request hashed to key was placed before and packing it again is not needed:
+    every one of its items is still where that placement put it, its containers are still defined as sent and no other items are queued.
+    Requests that left items unplaced are not cached, the items may fit once the state changes. Call it holding placement_lock.
+    """
+    placed = placement_cache.get(key)
+    if placed is None or items_ids_to_place:
+        return False
+    for container in data.get("containers") or []:
+        if defined_containers.get(container.get("containerId")) != container:
+            return False
+    for item_id, (container_id, position) in placed.items():
+        item_dict = current_item_state.get(item_id)
+        if item_dict is None or item_dict.get("containerId") != container_id or item_dict.get("position") != position:
+            return False
+    return True
+
+def run_placement(data: Dict, time_limit: Optional[float], incremental: bool, on_progress: Optional[Callable[[Any, int, int, bool], None]] = None, on_placed: Optional[Callable[[str, List[Dict[str, Any]]], None]] = None) -> Dict:
+    """
+    Adds the request's items and containers to the state and places the items.
+    Holds placement_lock, so placements run one at a time.
+    A request identical to one placed before is answered from the state, see is_placement_cached.
+    Returns the /api/placement response. With on_placed, it is called for every container as in calculate_placements,
+    then for the containers this placement did not pack, and the response counts the "containers" instead of listing the placements.
+    """
+    reported = set() #containers passed to on_placed
+    def container_placed(container_id: str, items: List[Dict[str, Any]]) -> None:
+        if container_id not in reported:
+            reported.add(container_id)
+            on_placed(container_id, items)
+
+    key = placement_request_key(data, incremental)
+    with placement_lock:
+        with placement_cache_lock:
+            cached = is_placement_cached(key, data)
+            if cached:
+                placement_cache.move_to_end(key)
+                placement_cache_stats["hits"] += 1
+            else:
+                placement_cache_stats["misses"] += 1
+        if cached:
+            result, progress, timed_out = 0.0, 1, False
+        else:
+            item_ids = [item.get("itemId") for item in data.get("items") or []]
+            placed_before = {item_id: current_item_state.get(item_id) for item_id in item_ids}
+            if data.get("items"):
+                items_list = data.get("items") #Gives list of dict, with keys itemId, width, height,depth, priority, expiry_date, usage_limit, preferredZone
+                record_event("items", items_list, True)
+            if data.get("containers"):
+                containers_list = data.get("containers")
+                record_event("containers", containers_list)
+            # print(items_ids_to_place)
+            # print(item_properties)
+            # print(zone_wise_containers)
+            # print(defined_containers)
+            result, progress, timed_out = calculate_placements(incremental=incremental, time_limit=time_limit, on_progress=on_progress, on_placed=container_placed if on_placed else None)
+            #kept only when this placement put every one of the request's items somewhere
+            placed_now = {item_id: current_item_state.get(item_id) for item_id in item_ids}
+            if item_ids and PLACEMENT_CACHE_SIZE > 0 and all(item_dict is not None and item_dict is not placed_before[item_id] for item_id, item_dict in placed_now.items()):
+                with placement_cache_lock:
+                    placement_cache[key] = {item_id: (item_dict["containerId"], copy.deepcopy(item_dict["position"])) for item_id, item_dict in placed_now.items()}
+                    placement_cache.move_to_end(key)
+                    while len(placement_cache) > PLACEMENT_CACHE_SIZE:
+                        placement_cache.popitem(last=False)
+
+
+        if on_placed:
+            for container_id, items in current_stowage_state.items():
+                container_placed(container_id, items)
+            total_items = sum(len(items) for items in current_stowage_state.values())
+        else:
+            placements = [item for items in current_stowage_state.values() for item in items]
+            total_items = len(placements)
+        add_log("placement", "container_placement", {"Total_items": total_items, "Total_containers": len(current_stowage_state.keys())}, userId="system_placement")
+    response = {
+        "success": True,
+        "Time_Taken": f'{result} seconds'
+    }
+    if on_placed:
+        response["containers"] = len(reported)
+    else:
+        response["placements"] = placements
+    if time_limit is not None:
+        response["timedOut"] = timed_out
+        response["progress"] = progress
+    return response
+
 @app.route("/api/placement", methods=['POST'])
 def api_placement():
     """
     Calculates optimal placement for new items.
     """
-    global item_properties
-    global items_ids_to_place
-    global zone_wise_containers
-    global defined_containers
-
     if not request.is_json:
         abort(400, description="Request must be JSON.")
     
     data = request.get_json()
-    
-    if data.get("items"):
-        items_list = data.get("items") #Gives list of dict, with keys itemId, width, height,depth, priority, expiry_date, usage_limit, preferredZone
-        for item in items_list:
-            item_properties[item.get('itemId')] = item
-            if item.get('itemId') not in items_ids_to_place:
-                items_ids_to_place.append(item.get('itemId'))
-            else:
-                print(f"{item.get('itemId')}Already in the list to be placed")
-    if data.get("containers"):
-        containers_list = data.get("containers")
-        container_dict={}
-        for container in containers_list:
-            try:
-                if container.get('zone') not in zone_wise_containers: zone_wise_containers[container.get('zone')] = []
-                zone_wise_containers[container.get('zone')].append(container["containerId"])
-                defined_containers[container["containerId"]] = container #Adding the container to defined containers.
-            except KeyError as e:
-                print(f"Error: Missing key {e} in container data.")
-    # print(items_ids_to_place)
-    # print(item_properties)
-    # print(zone_wise_containers)
-    # print(defined_containers)
-    result = calculate_placements()
+    time_limit, incremental = parse_placement_options(data)
+    if not data.get("stream"):
+        return jsonify(run_placement(data, time_limit, incremental))
 
-   
-    placements = [item for items in current_stowage_state.values() for item in items]
-    add_log("placement", "container_placement", {"Total_items": len(placements), "Total_containers": len(current_stowage_state.keys())}, userId="system_placement")
-    return jsonify({
-        "success": True,
-        "placements": placements,
-        "Time_Taken": f'{result} seconds'
-    })
+    # stream: NDJSON, one {"containerId", "placements"} line per container as soon as its zone is packed, then the summary line
+    # the placement runs in its own thread, the lines are written as they are made so later placements do not change them
+    placed_lines: "queue.Queue[Optional[str]]" = queue.Queue()
+    def on_placed(container_id: str, placements: List[Dict[str, Any]]) -> None:
+        placed_lines.put(app.json.dumps({"containerId": container_id, "placements": placements}) + "\n")
+
+    def place() -> None:
+        try:
+            summary = run_placement(data, time_limit, incremental, on_placed=on_placed)
+        except Exception as e:
+            summary = {"success": False, "description": f"An error occurred during placement: {e}"}
+        placed_lines.put(app.json.dumps(summary) + "\n")
+        placed_lines.put(None)
+
+    threading.Thread(target=place, daemon=True).start()
+    def lines() -> Iterator[str]:
+        while True:
+            line = placed_lines.get()
+            if line is None:
+                return
+            yield line
+    return Response(lines(), mimetype="application/x-ndjson")
+
+def forget_placement_jobs() -> None:
+    """
+    Drops the oldest finished jobs beyond PLACEMENT_JOBS_KEPT, and the placements of the ones beyond PLACEMENT_JOB_RESULTS_KEPT.
+    Call it holding placement_jobs_changed.
+    """
+    finished = [job_id for job_id, job in placement_jobs.items() if job["status"] in ("done", "failed")]
+    for job_id in finished[:max(len(finished) - PLACEMENT_JOBS_KEPT, 0)]:
+        del placement_jobs[job_id]
+    with_result = [job for job in placement_jobs.values() if job["result"] is not None]
+    for job in with_result[:max(len(with_result) - PLACEMENT_JOB_RESULTS_KEPT, 0)]:
+        job["result"] = None
+        job["resultDropped"] = True
+
+def run_placement_job(job_id: str, data: Dict, time_limit: Optional[float], incremental: bool) -> None:
+    """Runs a queued placement job on placement_executor, keeping its entry in placement_jobs up to date."""
+    def update(**changes: Any) -> None:
+        with placement_jobs_changed:
+            placement_jobs[job_id].update(changes)
+            placement_jobs[job_id]["version"] += 1
+            placement_jobs_changed.notify_all()
+
+    def on_progress(zone: Any, placed: int, total: int, done: bool) -> None:
+        with placement_jobs_changed:
+            job = placement_jobs[job_id]
+            zones = job["zones"]
+            key = "leftover" if zone is None else str(zone)
+            if key in zones:
+                job["itemsPlaced"] += placed - zones[key]["placed"]
+            elif zone is not None:
+                job["itemsTotal"] += total
+            zones[key] = {"placed": placed, "total": total, "done": done}
+            job["version"] += 1
+            placement_jobs_changed.notify_all()
+
+    update(status="running")
+    try:
+        result = run_placement(data, time_limit, incremental, on_progress)
+        #as the response would have sent it, later placements and retrievals change the item dicts it refers to
+        result = json.loads(app.json.dumps(result))
+    except Exception as e:
+        update(status="failed", error=getattr(e, "description", None) or str(e))
+    else:
+        update(status="done", result=result)
+    with placement_jobs_changed:
+        forget_placement_jobs()
+
+@app.route("/api/placement/jobs", methods=['POST'])
+def api_placement_jobs():
+    """
+    Queues a placement, takes the same JSON as /api/placement.
+    Returns the job id right away, GET /api/placement/jobs/<jobId> reports progress and the placements when done.
+    Only the PLACEMENT_JOB_RESULTS_KEPT most recently finished jobs keep their placements, older ones report resultDropped.
+    """
+    if not request.is_json:
+        abort(400, description="Request must be JSON.")
+
+    data = request.get_json()
+    time_limit, incremental = parse_placement_options(data)
+    job_id = str(uuid.uuid4())
+    with placement_jobs_changed:
+        placement_jobs[job_id] = {
+            "jobId": job_id,
+            "status": "queued",
+            "submitted": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "itemsPlaced": 0,
+            "itemsTotal": 0,
+            "zones": {}, #{'zone': {'placed': n, 'total': m, 'done': bool}, 'leftover': {...}}
+            "result": None,
+            "resultDropped": False,
+            "error": None,
+            "version": 0,
+        }
+        forget_placement_jobs()
+    placement_executor.submit(run_placement_job, job_id, data, time_limit, incremental)
+    return jsonify({"success": True, "jobId": job_id, "status": "queued"}), 202
+
+@app.route("/api/placement/jobs/<job_id>", methods=['GET'])
+def api_placement_job_status(job_id: str):
+    """
+    Status of a placement job.
+    With ?wait=<seconds> it long-polls: returns once the job changes after ?version=<n> (the version last seen), finishes, or the wait runs out.
+    """
+    try:
+        wait = min(float(request.args.get('wait', 0)), PLACEMENT_JOB_MAX_WAIT)
+        version = int(request.args.get('version', -1))
+    except ValueError:
+        abort(400, description="wait and version must be numbers.")
+    with placement_jobs_changed:
+        if job_id not in placement_jobs:
+            abort(404, description=f"Unknown job {job_id}.")
+        placement_jobs_changed.wait_for(
+            lambda: placement_jobs[job_id]["version"] > version or placement_jobs[job_id]["status"] in ("done", "failed"),
+            timeout=wait)
+        #result is a copy made when the job finished and is only ever replaced, only the progress needs copying
+        job = dict(placement_jobs[job_id], zones=copy.deepcopy(placement_jobs[job_id]["zones"]))
+    return jsonify({"success": True, **job})
+
+@app.route("/api/placement/cache", methods=['GET'])
+def api_placement_cache():
+    """
+    Hit/miss counters and size of the placement request cache, see is_placement_cached.
+    """
+    with placement_cache_lock:
+        return jsonify({
+            "success": True,
+            "hits": placement_cache_stats["hits"],
+            "misses": placement_cache_stats["misses"],
+            "size": len(placement_cache),
+            "maxSize": PLACEMENT_CACHE_SIZE
+        })
 
 # --- 2. Search & Retrieval ---
 @app.route("/api/search", methods=['GET'])
@@ -483,7 +1446,9 @@ def api_search():
     search_key = item_id if item_id else item_name
     search_type = 'itemId' if item_id else 'itemName'
 
-    result = find_best_retrieval_option(search_key, search_type)
+    minimize = parse_retrieval_minimize(request.args.get('minimize'))
+
+    result = find_best_retrieval_option(search_key, search_type, minimize)
     add_log("search", search_key, {"type": search_type}, userId="system_search")
     return jsonify({
         "success": True,
@@ -492,11 +1457,36 @@ def api_search():
         "retrievalSteps": result["retrievalSteps"]
     })
 
+@app.route("/api/search/batch", methods=['POST'])
+def api_search_batch():
+    """
+    Searches for many items at once: {"itemIds": [...], "itemNames": [...], "minimize": "moves" or "mass"}.
+    Returns a result per search, ids first, each like /api/search's, and retrievalSequence, the steps to take all the found items out.
+    """
+    if not request.is_json:
+        abort(400, description="Request must be JSON.")
+    data = request.get_json()
+    item_ids = data.get("itemIds") or []
+    item_names = data.get("itemNames") or []
+    if not isinstance(item_ids, list) or not isinstance(item_names, list):
+        abort(400, description="itemIds and itemNames must be lists.")
+    if not item_ids and not item_names:
+        abort(400, description="Either itemIds or itemNames must be provided.")
+
+    searches = [(item_id, 'itemId') for item_id in item_ids] + [(item_name, 'itemName') for item_name in item_names]
+    results, retrieval_sequence = find_batch_retrieval_options(searches, parse_retrieval_minimize(data.get("minimize")))
+    add_log("search", "batch_search", {"itemIds": item_ids, "itemNames": item_names}, userId="system_search")
+    return jsonify({
+        "success": True,
+        "results": [
+            {"searchKey": search_key, "searchType": search_type, "found": result["found"], "item": result["item"], "retrievalSteps": result["retrievalSteps"]}
+            for (search_key, search_type), result in zip(searches, results)
+        ],
+        "retrievalSequence": retrieval_sequence
+    })
+
 @app.route("/api/retrieve", methods=['POST'])
 def api_retrieve():
-    global usage_log
-    global waste_items
-    global item_properties
     if not request.is_json:
         abort(400, description="Request must be JSON.")  
     data = request.get_json()
@@ -512,15 +1502,7 @@ def api_retrieve():
     timestamp = data.get("timestamp", current_simulated_time.isoformat())
     retrieval_log_entry = {"userId": userId, "timestamp": timestamp}
     add_log("retrieve", itemId_to_retrieve, retrieval_log_entry, userId="system_retrieve")
-    usage_log[itemId_to_retrieve]["total_uses"] += 1
-    usage_log[itemId_to_retrieve]["retrievals"].append(retrieval_log_entry)
-    item_properties[itemId_to_retrieve]["usage_limit"] -= 1 #Reducing usage Limit
-    if is_item_depleted(itemId_to_retrieve):
-        #Updating waste item List
-        waste_item_to_add = current_item_state.get(itemId_to_retrieve)
-        waste_item_to_add["reason"] = "Out of Uses"
-        if waste_item_to_add not in waste_items:    
-            waste_items.append(waste_item_to_add)
+    record_event("retrieved", itemId_to_retrieve, retrieval_log_entry)
     return jsonify({"success": True})
 
 
@@ -656,8 +1638,6 @@ def api_waste_complete_undocking():
 # --- 4. Time Simulation ---
 @app.route("/api/simulate/day", methods=['POST'])
 def api_simulate_day():
-    global current_simulated_time
-    global waste_items
     if not request.is_json: abort(400, description="Request must be JSON.")
     data = request.get_json()
 
@@ -668,32 +1648,7 @@ def api_simulate_day():
     if num_days is None or num_days < 1:
         num_days = 1
 
-    total_changes = {"itemsUsed": [], "itemsExpired": []}
-
-    for _ in range(num_days):
-        changes_today, new_sim_time = simulate_one_day(items_to_be_used, current_simulated_time)
-        current_simulated_time = new_sim_time # Update global time
-
-        # Aggregate changes (simple list extend)
-        total_changes["itemsUsed"].extend(
-            item for item in changes_today["itemsUsed"] if item not in total_changes["itemsUsed"]
-        )
-        total_changes["itemsExpired"].extend(
-            item for item in changes_today["itemsExpired"] if item not in total_changes["itemsExpired"]
-        )
-
-    for item_used_id in total_changes['itemsUsed']:
-        waste_item_to_add = current_item_state.get(item_used_id)
-        waste_item_to_add["reason"] = "Out of Uses"
-        if waste_item_to_add in waste_items:
-            continue
-        waste_items.append(waste_item_to_add)
-    for item_used_id in total_changes['itemsExpired']:
-        waste_item_to_add = current_item_state.get(item_used_id)
-        waste_item_to_add["reason"] = "Expired"
-        if waste_item_to_add in waste_items:
-            continue
-        waste_items.append(waste_item_to_add)
+    total_changes = record_event("simulated", num_days, items_to_be_used)
     print(waste_items)
     
     # Add simulation log
@@ -706,44 +1661,134 @@ def api_simulate_day():
     })
 
 # --- 5. Import/Export ---
+def rename_item_columns(df: pd.DataFrame) -> None:
+    """Normalize column names if alternative columns are used."""
+    if all(col in df.columns for col in ITEM_ALTERNATIVE_COLUMNS):
+        df.rename(columns={
+            'item_id': 'itemId',
+            'width_cm': 'width',
+            'depth_cm': 'depth',
+            'height_cm': 'height',
+            'mass_kg': 'mass'
+        }, inplace=True)
+
+def csv_chunk_types(stream: Any, chunk_rows: int) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Reads the CSV in stream chunk by chunk for the types read_csv gives its columns, yielding (rows read, None) after every chunk
+    and finally (rows read, dtype overrides). The overrides make every chunk read a column the same way read_csv reads it from
+    the whole file: float where the chunks' types differ but are all numbers, str where they differ otherwise.
+    """
+    dtypes: Dict[str, set] = {}
+    rows = 0
+    for chunk in pd.read_csv(stream, chunksize=chunk_rows):
+        for column, dtype in chunk.dtypes.items():
+            dtypes.setdefault(column, set()).add(dtype)
+        rows += len(chunk)
+        yield rows, None
+    overrides = {}
+    for column, column_dtypes in dtypes.items():
+        if len(column_dtypes) > 1:
+            overrides[column] = float if all(dtype.kind in 'iuf' for dtype in column_dtypes) else str
+    yield rows, overrides
+
+def import_flag(name: str) -> bool:
+    """True if the import request sets name (in the query string or the form) to 1, true or yes."""
+    return str(request.values.get(name, '')).lower() in ('1', 'true', 'yes')
+
+def stream_import(file: Any, kind: str, place: bool) -> Response:
+    """
+    Imports an uploaded CSV of kind "items" or "containers" a chunk of IMPORT_CHUNK_ROWS (or the chunkSize field) rows at a time,
+    so only one chunk is ever parsed in memory. A first pass over the file settles the column types (see csv_chunk_types),
+    so rows come out as in the one-go import, the second adds every chunk to the state as soon as it is read.
+    With place, the queued items are placed (incrementally, into the space left in the containers) after every chunk of items.
+    Answers with NDJSON: a line per chunk of each pass, {"phase": "scan", "rowsRead", "progress"} then
+    {"phase": "import", "rowsRead", "<kind>Imported", "errors", "progress"(, "itemsPlaced")}, errors being the chunk's,
+    and last {"success", "<kind>Imported", "errors"(count)}, with "description" if the file turned out not to parse part way.
+    """
+    chunk_rows = request.values.get("chunkSize", IMPORT_CHUNK_ROWS)
+    try:
+        chunk_rows = int(chunk_rows)
+    except (TypeError, ValueError):
+        chunk_rows = 0
+    if chunk_rows < 1:
+        abort(400, description="chunkSize must be a positive number of rows.")
+    #the upload is closed when the request ends, before the response is streamed, so the chunks are read from a copy on disk
+    stream = tempfile.TemporaryFile()
+    shutil.copyfileobj(file.stream, stream)
+    size = stream.tell()
+    stream.seek(0)
+    try:
+        columns = list(pd.read_csv(stream, nrows=0).columns)
+        stream.seek(0)
+    except (pd.errors.ParserError, pd.errors.EmptyDataError):
+        stream.close()
+        abort(400, description="Error parsing CSV file.")
+    if (kind == "items" and not all(col in columns for col in ITEM_COLUMNS) and not all(col in columns for col in ITEM_ALTERNATIVE_COLUMNS)) or (kind == "containers" and not all(col in columns for col in CONTAINER_COLUMNS)):
+        stream.close()
+        required = f"{ITEM_COLUMNS} or {ITEM_ALTERNATIVE_COLUMNS}" if kind == "items" else f"{CONTAINER_COLUMNS}"
+        abort(400, description=f"CSV missing required columns: {required}")
+
+    def lines() -> Iterator[str]:
+        rows = 0
+        imported_count = 0
+        error_count = 0
+        summary: Dict[str, Any] = {"success": True}
+        try:
+            for rows, overrides in csv_chunk_types(stream, chunk_rows):
+                if overrides is None:
+                    yield app.json.dumps({"phase": "scan", "rowsRead": rows, "progress": min(stream.tell() / size, 1.0) if size else 1.0}) + "\n"
+            stream.seek(0)
+            rows = 0
+            for chunk in pd.read_csv(stream, chunksize=chunk_rows, dtype=overrides):
+                if kind == "items":
+                    rename_item_columns(chunk)
+                    added, errors, skipped = import_items_frame(chunk)
+                    record_event("items", added, False)
+                else:
+                    added, errors, skipped = import_containers_frame(chunk)
+                    record_event("containers", added)
+                if skipped:
+                    print(f"{skipped} {kind[:-1]} IDs already exist. Skipping.")
+                rows += len(chunk)
+                imported_count += len(added)
+                error_count += len(errors)
+                line = {"phase": "import", "rowsRead": rows, f"{kind}Imported": imported_count, "errors": errors, "progress": min(stream.tell() / size, 1.0) if size else 1.0}
+                if place:
+                    placed_before = len(current_item_state)
+                    run_placement({}, None, True)
+                    line["itemsPlaced"] = len(current_item_state) - placed_before
+                yield app.json.dumps(line) + "\n"
+        except Exception as e:
+            summary = {"success": False, "description": f"An error occurred during import: {e}"}
+        finally:
+            stream.close()
+        add_log("import", kind, {"count": imported_count, "errors": error_count}, userId="system_import")
+        summary.update({f"{kind}Imported": imported_count, "errors": error_count})
+        yield app.json.dumps(summary) + "\n"
+
+    return Response(lines(), mimetype="application/x-ndjson")
+
 @app.route("/api/import/containers", methods=['POST'])
 def api_import_containers():
-    global zone_wise_containers
-    global defined_containers
     files = list(request.files.values())
     file = files[0] if files else abort(400, description="No file part.")
     if file.filename == '':
         abort(400, description="No selected file.")
+    if file and file.filename.endswith('.csv') and import_flag("stream"):
+        return stream_import(file, "containers", False)
     if file and file.filename.endswith('.csv'):
         try:
             df = pd.read_csv(file)
             # --- Add column validation ---
-            required_cols = ['zone','container_id', 'width_cm', 'depth_cm', 'height_cm']
-            if not all(col in df.columns for col in required_cols):
-                 abort(400, description=f"CSV missing required columns: {required_cols}")
-
-            imported_count = 0
-            errors = []
-            for index, row in df.iterrows():
-                container_dict = row.to_dict()
-                 # Add type conversion/validation if needed
-                try:
-                    container_dict['zone'] = str(container_dict.get('zone'))
-                    container_dict['width'] = float(container_dict.pop('width_cm'))
-                    container_dict['depth'] = float(container_dict.pop('depth_cm'))
-                    container_dict['height'] = float(container_dict.pop('height_cm'))
-                    container_dict['containerId'] = container_dict.pop('container_id')
-                    if defined_containers.get(container_dict['containerId']):
-                        print("Container ID already exists. Skipping.")
-                        continue
-                    defined_containers[container_dict['containerId']] = container_dict
-                    # print(defined_containers[container_dict['containerId']])
-                    if container_dict.get('zone') not in zone_wise_containers: zone_wise_containers[container_dict.get('zone')] = []
-                    zone_wise_containers[container_dict.get('zone')].append(container_dict['containerId'])
-
-                    imported_count += 1
-                except (ValueError, TypeError) as e:
-                    errors.append({"row": index + 2, "message": f"Invalid numeric data: {e}"})
+            if not all(col in df.columns for col in CONTAINER_COLUMNS):
+                 abort(400, description=f"CSV missing required columns: {CONTAINER_COLUMNS}")
+
+            # Convert whole columns, then add all the containers at once
+            containers_list, errors, skipped = import_containers_frame(df)
+            if skipped:
+                print(f"{skipped} container IDs already exist. Skipping.")
+            record_event("containers", containers_list)
+            imported_count = len(containers_list)
             # print(defined_containers)
 
 
@@ -758,61 +1803,27 @@ def api_import_containers():
 
 @app.route("/api/import/items", methods=['POST'])
 def api_import_items():
-    global item_properties
-    global items_ids_to_place
-    
     # if 'itemsFile' not in request.files: abort(400, description="No file part.")
     files = list(request.files.values())
     file = files[0] if files else abort(400, description="No file part.")
     if file.filename == '': abort(400, description="No selected file.")
+    if file and file.filename.endswith('.csv') and import_flag("stream"):
+        return stream_import(file, "items", import_flag("place"))
     if file and file.filename.endswith('.csv'):
         try:
             df = pd.read_csv(file)
             # --- Add column validation ---
-            required_cols = ['itemId', 'name', 'width', 'depth', 'height', 'mass', 'priority']
-            alternative_cols = ['item_id', 'name', 'width_cm', 'depth_cm', 'height_cm', 'mass_kg', 'priority']
-            
-            if not all(col in df.columns for col in required_cols) and not all(col in df.columns for col in alternative_cols):
-                abort(400, description=f"CSV missing required columns: {required_cols} or {alternative_cols}")
-
-            # Normalize column names if alternative columns are used
-            if all(col in df.columns for col in alternative_cols):
-                df.rename(columns={
-                    'item_id': 'itemId',
-                    'width_cm': 'width',
-                    'depth_cm': 'depth',
-                    'height_cm': 'height',
-                    'mass_kg': 'mass'
-                }, inplace=True)
-
-            imported_count = 0
-            errors = []
-            for index, row in df.iterrows():
-                item_dict = row.to_dict()
-                # Clean up potential NaN from optional fields read by pandas
-                item_dict = {k: (v if pd.notna(v) else None) for k, v in item_dict.items()}
-                # Add type conversion/validation
-                try:
-                    if item_properties.get(item_dict['itemId']):
-                        print("Item Id already exists. Skipping.")
-                        continue
-                    item_dict['name'] = str(item_dict.get('name', 'Unknown'))
-                    item_dict['width'] = float(item_dict.get('width', 0.0))
-                    item_dict['depth'] = float(item_dict.get('depth', 0.0))
-                    item_dict['height'] = float(item_dict.get('height', 0.0))
-                    item_dict['mass'] = float(item_dict.get('mass', 0.0))
-                    item_dict['priority'] = int(item_dict.get('priority', 0))
-                    item_dict['preferredZone'] = str(item_dict.pop('preferred_zone', 'default_zone'))
-                    # Optional fields
-                    if item_dict.get('usage_limit') is not None: item_dict['usage_limit'] = int(item_dict['usage_limit'])
-                    # Keep expiry_date as string for now, parse when needed
-                    if item_dict.get('expiry_date') is not None: item_dict['expiry_date'] = parse_iso_datetime(item_dict['expiry_date'])  
-                    item_properties[item_dict['itemId']] = item_dict
-                    items_ids_to_place.append(item_dict['itemId'])
-                    imported_count += 1
-                except (ValueError, TypeError) as e:
-                    errors.append({"row": index + 2, "message": f"Invalid numeric/integer data: {e}"})
-                # print(index, row)
+            if not all(col in df.columns for col in ITEM_COLUMNS) and not all(col in df.columns for col in ITEM_ALTERNATIVE_COLUMNS):
+                abort(400, description=f"CSV missing required columns: {ITEM_COLUMNS} or {ITEM_ALTERNATIVE_COLUMNS}")
+
+            rename_item_columns(df)
+
+            # Convert whole columns, then add all the items at once
+            items_list, errors, skipped = import_items_frame(df)
+            if skipped:
+                print(f"{skipped} item IDs already exist. Skipping.")
+            record_event("items", items_list, False)
+            imported_count = len(items_list)
 
             # print(item_properties)
             add_log("import", "items", {"count": imported_count, "errors": len(errors)}, userId="system_import")
@@ -926,7 +1937,29 @@ def handle_exception(e):
     response.status_code = 500
     return response
 
+@app.before_request
+def load_state_first() -> None:
+    """Loads the state kept in STATE_DIR before the first request, when the server was not started by start_app (a WSGI server, flask run)."""
+    if STATE_DIR and not state_log["loaded"]:
+        load_state()
+
+def start_app() -> None:
+    """
+    Readies the server before it takes requests: restores the state kept in STATE_DIR (see load_state),
+    and starts the placement workers, so the first placement does not wait for them.
+    """
+    load_state()
+    if PLACEMENT_WORKERS > 1:
+        executor = get_placement_pool()
+        #workers are spawned as tasks come in, one task each starts them all
+        wait([executor.submit(int) for _ in range(PLACEMENT_WORKERS)])
+
 # --- Flask App Execution ---
 if __name__ == '__main__':
+    debug = True
+    use_reloader = debug
+    #with the reloader, requests are served by a child process it starts, which runs this file again, only that one is readied
+    if is_running_from_reloader() or not use_reloader:
+        start_app()
     #Run on 0.0.0.0 to be accessible within Docker network
-    app.run(host='0.0.0.0', port=8000, debug=True)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=8000, debug=debug, use_reloader=use_reloader)
\ No newline at end of file
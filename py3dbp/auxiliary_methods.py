@@ -1,4 +1,5 @@
 from decimal import Decimal
+import numpy as np
 from .constants import Axis
 
 
@@ -33,3 +34,21 @@ def set2Decimal(value, number_of_decimals=0):
     number_of_decimals = getLimitNumberOfDecimals(number_of_decimals)
 
     return Decimal(value).quantize(number_of_decimals)
+
+
+def set2Number(value, number_of_decimals=0):
+    ''' set2Decimal, but a plain int when number_of_decimals is 0 '''
+    if number_of_decimals != 0:
+        return set2Decimal(value, number_of_decimals)
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        # round() is half-even, like Decimal.quantize
+        return round(value)
+
+    return int(set2Decimal(value))
+
+
+def overlapLength(lo, hi, los, his):
+    ''' len(set(range(lo, hi)) & set(range(int(l), int(h)))) for every l, h in los, his '''
+    return np.clip(np.minimum(hi, np.trunc(his)) - np.maximum(lo, np.trunc(los)), 0, None)
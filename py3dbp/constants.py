@@ -7,6 +7,8 @@ class RotationType:
     RT_WDH = 5
 
     ALL = [RT_WHD, RT_HWD, RT_HDW, RT_DHW, RT_DWH, RT_WDH]
+    # for each rotation type, which of (width, height, depth) lies along each axis
+    AXES = [(0, 1, 2), (1, 0, 2), (1, 2, 0), (2, 1, 0), (2, 0, 1), (0, 2, 1)]
     # un upright or un updown
     Notupdown = [RT_WHD,RT_HWD]
  
@@ -17,3 +19,11 @@ class Axis:
 
     ALL = [WIDTH, HEIGHT, DEPTH]
 
+
+class PivotStrategy:
+    # +W, +H, +D corners of the placed items, in placement order
+    CORNERS = 'corners'
+    # extreme points, kept up to date as items are placed
+    EXTREME_POINTS = 'extreme_points'
+
+    ALL = [CORNERS, EXTREME_POINTS]
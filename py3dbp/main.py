@@ -1,19 +1,30 @@
-from .constants import RotationType, Axis
-from .auxiliary_methods import intersect, set2Decimal
+from .constants import RotationType, Axis, PivotStrategy
+from .auxiliary_methods import set2Number, overlapLength
+from .spatial_index import SpatialGrid
+from .extreme_points import ExtremePoints
 import numpy as np
 # required to plot a representation of Bin and contained items 
 # from matplotlib.patches import Rectangle,Circle
 # import matplotlib.pyplot as plt
 # import mpl_toolkits.mplot3d.art3d as art3d
-from collections import Counter
-import copy
+from collections import Counter, namedtuple
+import time
 DEFAULT_NUMBER_OF_DECIMALS = 0
 START_POSITION = [0, 0, 0]
+# initial number of rows in Bin.fit_buffer
+FIT_BUFFER_CAPACITY = 16
 
 
 
 class Item:
 
+    # no per-instance __dict__, manifests can hold a lot of items
+    __slots__ = (
+        'partno', 'name', 'typeof', 'width', 'height', 'depth', 'weight', 'level',
+        'loadbear', 'updown', 'color', 'rotation_type', 'position', 'number_of_decimals',
+        'dimensions', 'rotations',
+    )
+
     def __init__(self, partno,name,typeof, WHD, weight, level, loadbear, updown, color):
         ''' '''
         self.partno = partno
@@ -34,15 +45,43 @@ class Item:
         self.rotation_type = 0
         self.position = START_POSITION
         self.number_of_decimals = DEFAULT_NUMBER_OF_DECIMALS
+        # rotation table, built by setRotations on first use
+        self.dimensions = None
+        self.rotations = None
+
+
+    def setRotations(self):
+        ''' precompute the dimension of every rotation type and the distinct ones that are allowed '''
+        whd = (self.width, self.height, self.depth)
+        self.dimensions = tuple((whd[w], whd[h], whd[d]) for w, h, d in RotationType.AXES)
+        # (rotation type, dimension) pairs tried by putItem, rotations giving the same box are dropped
+        rotations = []
+        seen = set()
+        for rotation_type in (RotationType.ALL if self.updown == True else RotationType.Notupdown):
+            dimension = self.dimensions[rotation_type]
+            if dimension not in seen:
+                seen.add(dimension)
+                rotations.append((rotation_type, dimension))
+        self.rotations = tuple(rotations)
+
+
+    def getRotations(self):
+        ''' distinct allowed (rotation type, dimension) pairs '''
+        if self.rotations is None:
+            self.setRotations()
+
+        return self.rotations
 
 
     def formatNumbers(self, number_of_decimals):
-        ''' '''
-        self.width = set2Decimal(self.width, number_of_decimals)
-        self.height = set2Decimal(self.height, number_of_decimals)
-        self.depth = set2Decimal(self.depth, number_of_decimals)
-        self.weight = set2Decimal(self.weight, number_of_decimals)
+        ''' plain ints when number_of_decimals is 0, Decimal otherwise '''
+        self.width = set2Number(self.width, number_of_decimals)
+        self.height = set2Number(self.height, number_of_decimals)
+        self.depth = set2Number(self.depth, number_of_decimals)
+        self.weight = set2Number(self.weight, number_of_decimals)
         self.number_of_decimals = number_of_decimals
+        self.dimensions = None
+        self.rotations = None
 
 
     def string(self):
@@ -55,39 +94,58 @@ class Item:
 
     def getVolume(self):
         ''' '''
-        return set2Decimal(self.width * self.height * self.depth, self.number_of_decimals)
+        return set2Number(self.width * self.height * self.depth, self.number_of_decimals)
 
 
     def getMaxArea(self):
         ''' '''
         a = sorted([self.width,self.height,self.depth],reverse=True) if self.updown == True else [self.width,self.height,self.depth]
     
-        return set2Decimal(a[0] * a[1] , self.number_of_decimals)
+        return set2Number(a[0] * a[1] , self.number_of_decimals)
 
 
-    def getDimension(self):
+    def getDimension(self, rotation_type=None):
         ''' rotation type '''
-        if self.rotation_type == RotationType.RT_WHD:
-            dimension = [self.width, self.height, self.depth]
-        elif self.rotation_type == RotationType.RT_HWD:
-            dimension = [self.height, self.width, self.depth]
-        elif self.rotation_type == RotationType.RT_HDW:
-            dimension = [self.height, self.depth, self.width]
-        elif self.rotation_type == RotationType.RT_DHW:
-            dimension = [self.depth, self.height, self.width]
-        elif self.rotation_type == RotationType.RT_DWH:
-            dimension = [self.depth, self.width, self.height]
-        elif self.rotation_type == RotationType.RT_WDH:
-            dimension = [self.width, self.depth, self.height]
-        else:
-            dimension = []
+        if rotation_type is None:
+            rotation_type = self.rotation_type
+        if self.dimensions is None:
+            self.setRotations()
+
+        return self.dimensions[rotation_type]
+
+
 
-        return dimension
+class Placement(namedtuple('Placement', ['item', 'position', 'rotation_type'])):
+    ''' an item as placed in a bin, other attributes are read from the item '''
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        ''' partno, name, weight, ... of the placed item '''
+        return getattr(self.item, name)
+
+
+    def getDimension(self):
+        ''' dimension of the item in its placed rotation '''
+        return self.item.getDimension(self.rotation_type)
+
+
+    def string(self):
+        ''' '''
+        return "%s(%sx%sx%s, weight: %s) pos(%s) rt(%s) vol(%s)" % (
+            self.partno, self.width, self.height, self.depth, self.weight,
+            list(self.position), self.rotation_type, self.getVolume()
+        )
 
 
 
 class Bin:
 
+    __slots__ = (
+        'partno', 'width', 'height', 'depth', 'max_weight', 'corner', 'items', 'total_weight',
+        'fit_buffer', 'fit_count', 'index', 'extreme_points', 'unfitted_items', 'number_of_decimals', 'fix_point', 'check_stable',
+        'support_surface_ratio', 'put_type', 'gravity',
+    )
+
     def __init__(self, partno, WHD, max_weight,corner=0,put_type=1):
         ''' '''
         self.partno = partno
@@ -97,7 +155,16 @@ class Bin:
         self.max_weight = max_weight
         self.corner = corner
         self.items = []
-        self.fit_items = np.array([[0,WHD[0],0,WHD[1],0,0]])
+        # weight of the items in the bin, kept up to date on every insert
+        self.total_weight = 0
+        # extents of placed items, grown by doubling, the first fit_count rows are in use
+        self.fit_buffer = np.empty((FIT_BUFFER_CAPACITY,6),dtype=float)
+        self.fit_buffer[0] = [0,WHD[0],0,WHD[1],0,0]
+        self.fit_count = 1
+        # spatial index over fit_items rows, used for collision checks
+        self.index = SpatialGrid(WHD[0], WHD[1], WHD[2])
+        # candidate pivots for PivotStrategy.EXTREME_POINTS
+        self.extreme_points = ExtremePoints(WHD[0], WHD[1], WHD[2])
         self.unfitted_items = []
         self.number_of_decimals = DEFAULT_NUMBER_OF_DECIMALS
         self.fix_point = False
@@ -109,12 +176,20 @@ class Bin:
 
 
     def formatNumbers(self, number_of_decimals):
-        ''' '''
-        self.width = set2Decimal(self.width, number_of_decimals)
-        self.height = set2Decimal(self.height, number_of_decimals)
-        self.depth = set2Decimal(self.depth, number_of_decimals)
-        self.max_weight = set2Decimal(self.max_weight, number_of_decimals)
+        ''' plain ints when number_of_decimals is 0, Decimal otherwise '''
+        self.width = set2Number(self.width, number_of_decimals)
+        self.height = set2Number(self.height, number_of_decimals)
+        self.depth = set2Number(self.depth, number_of_decimals)
+        self.max_weight = set2Number(self.max_weight, number_of_decimals)
         self.number_of_decimals = number_of_decimals
+        self.extreme_points = ExtremePoints(self.width, self.height, self.depth, number_of_decimals)
+        # items put in before packing (see putPlacedItem) get their numbers formatted like the packed ones, then are put back
+        placements = self.items
+        self.clearBin()
+        for placement in placements:
+            placement.item.formatNumbers(number_of_decimals)
+            self.putPlacedItem(placement.item, [set2Number(p, number_of_decimals) for p in placement.position])
+            self.addExtremePoints()
 
 
     def string(self):
@@ -127,30 +202,57 @@ class Bin:
 
     def getVolume(self):
         ''' '''
-        return set2Decimal(
+        return set2Number(
             self.width * self.height * self.depth, self.number_of_decimals
         )
 
 
     def getTotalWeight(self):
         ''' '''
-        total_weight = 0
+        return set2Number(self.total_weight, self.number_of_decimals)
 
-        for item in self.items:
-            total_weight += item.weight
 
-        return set2Decimal(total_weight, self.number_of_decimals)
+    def fitWeight(self, item):
+        ''' True if item can be added without exceeding max_weight '''
+        return self.total_weight + item.weight <= self.max_weight
+
+
+    @property
+    def fit_items(self):
+        ''' extents of placed items, one row [x0,x1,y0,y1,z0,z1] each, first row is the floor '''
+        return self.fit_buffer[:self.fit_count]
+
+
+    def addFitItem(self, extent, box=None):
+        ''' record the extent [x0,x1,y0,y1,z0,z1] of a placed item, box is what collision checks see if it differs '''
+        if self.fit_count == len(self.fit_buffer):
+            fit_buffer = np.empty((2 * len(self.fit_buffer),6),dtype=float)
+            fit_buffer[:self.fit_count] = self.fit_buffer
+            self.fit_buffer = fit_buffer
+        self.fit_buffer[self.fit_count] = extent
+        self.fit_count += 1
+        self.index.insert(self.fit_count - 1, extent if box is None else box)
+
+
+    def addExtremePoints(self, placement=None):
+        ''' update the extreme points with placement, the last placed item by default '''
+        if placement is None:
+            placement = self.items[-1]
+        [x,y,z] = placement.position
+        [w,h,d] = placement.getDimension()
+        self.extreme_points.insert((x,x+w,y,y+h,z,z+d), self.fit_items)
 
 
     def putItem(self, item, pivot,axis=None):
         ''' put item in bin '''
         fit = False
+        if not self.fitWeight(item):
+            return fit
+
         valid_item_position = item.position
         item.position = pivot
-        rotate = RotationType.ALL if item.updown == True else RotationType.Notupdown
-        for i in range(0, len(rotate)):
-            item.rotation_type = i
-            dimension = item.getDimension()
+        for rotation_type, dimension in item.getRotations():
+            item.rotation_type = rotation_type
             # rotatate
             if (
                 self.width < pivot[0] + dimension[0] or
@@ -159,19 +261,11 @@ class Bin:
             ):
                 continue
 
-            fit = True
-
-            for current_item_in_bin in self.items:
-                if intersect(current_item_in_bin, item):
-                    fit = False
-                    break
+            [x,y,z] = pivot
+            [w,h,d] = dimension
+            fit = not self.index.intersects((x,x+w,y,y+h,z,z+d))
 
             if fit:
-                # cal total weight
-                if self.getTotalWeight() + item.weight > self.max_weight:
-                    fit = False
-                    return fit
-                
                 # fix point float prob
                 if self.fix_point == True :
                         
@@ -193,35 +287,39 @@ class Bin:
                     if self.check_stable == True :
                         # Cal the surface area of ​​item.
                         item_area_lower = int(dimension[0] * dimension[1])
-                        # Cal the surface area of ​​the underlying support.
-                        support_area_upper = 0
-                        for i in self.fit_items:
-                            # Verify that the lower support surface area is greater than the upper support surface area * support_surface_ratio.
-                            if z == i[5]  :
-                                area = len(set([ j for j in range(int(x),int(x+int(w)))]) & set([ j for j in range(int(i[0]),int(i[1]))])) * \
-                                len(set([ j for j in range(int(y),int(y+int(h)))]) & set([ j for j in range(int(i[2]),int(i[3]))]))
-                                support_area_upper += area
+                        # Cal the surface area of ​​the underlying support, the items whose top is at z.
+                        fit_items = self.fit_items
+                        support = fit_items[fit_items[:,5] == z]
+                        # Verify that the lower support surface area is greater than the upper support surface area * support_surface_ratio.
+                        support_area_upper = int(np.sum(
+                            overlapLength(int(x),int(x+int(w)),support[:,0],support[:,1]) *
+                            overlapLength(int(y),int(y+int(h)),support[:,2],support[:,3])
+                        ))
 
                         # If not , get four vertices of the bottom of the item.
                         if support_area_upper / item_area_lower < self.support_surface_ratio :
                             four_vertices = [[x,y],[x+float(w),y],[x,y+float(h)],[x+float(w),y+float(h)]]
                             #  If any vertices is not supported, fit = False.
-                            c = [False,False,False,False]
-                            for i in self.fit_items:
-                                if z == i[5] :
-                                    for jdx,j in enumerate(four_vertices) :
-                                        if (i[0] <= j[0] <= i[1]) and (i[2] <= j[1] <= i[3]) :
-                                            c[jdx] = True
+                            c = [
+                                bool(np.any((support[:,0] <= j[0]) & (j[0] <= support[:,1]) & (support[:,2] <= j[1]) & (j[1] <= support[:,3])))
+                                for j in four_vertices
+                            ]
                             if False in c :
                                 item.position = valid_item_position
                                 fit = False
                                 return fit
                         
-                    self.fit_items = np.append(self.fit_items,np.array([[x,x+float(w),y,y+float(h),z,z+float(d)]]),axis=0)
-                    item.position = [set2Decimal(x),set2Decimal(y),set2Decimal(z)]
+                    item.position = [set2Number(x),set2Number(y),set2Number(z)]
+                    # collisions are checked against the rounded position, as item.position reports it
+                    [x_,y_,z_] = item.position
+                    self.addFitItem([x,x+float(w),y,y+float(h),z,z+float(d)],(x_,x_+w,y_,y_+h,z_,z_+d))
+
+                else :
+                    self.addFitItem([x,x+w,y,y+h,z,z+d])
 
                 if fit :
-                    self.items.append(copy.deepcopy(item))
+                    self.items.append(Placement(item, tuple(item.position), item.rotation_type))
+                    self.total_weight += item.weight
 
             else :
                 item.position = valid_item_position
@@ -234,77 +332,46 @@ class Bin:
         return fit
 
 
+    def fixPosition(self,unfix_point,axis,size):
+        ''' lowest gap along axis that fits unfix_point, among the items it overlaps on the other two axes '''
+        a, b = [i for i in range(3) if i != axis]
+        # overlaps are counted in whole units, int() of the bounds, like the original set(range()) version
+        fit_items = self.fit_items
+        overlap = (overlapLength(int(unfix_point[2*a]),int(unfix_point[2*a+1]),fit_items[:,2*a],fit_items[:,2*a+1]) > 0) & \
+            (overlapLength(int(unfix_point[2*b]),int(unfix_point[2*b+1]),fit_items[:,2*b],fit_items[:,2*b+1]) > 0)
+        rows = fit_items[overlap]
+        # walls at 0 and size, then the overlapping items sorted by their far side
+        lo = np.concatenate(([0.0,float(size)],rows[:,2*axis]))
+        hi = np.concatenate(([0.0,float(size)],rows[:,2*axis+1]))
+        order = np.argsort(hi,kind='stable')
+        lo = lo[order]
+        hi = hi[order]
+        top = unfix_point[2*axis+1] - unfix_point[2*axis]
+        gaps = np.nonzero(lo[1:] - hi[:-1] >= top)[0]
+        if len(gaps):
+            return float(hi[gaps[0]])
+        return unfix_point[2*axis]
+
+
     def checkDepth(self,unfix_point):
         ''' fix item position z '''
-        z_ = [[0,0],[float(self.depth),float(self.depth)]]
-        for j in self.fit_items:
-            # creat x set
-            x_bottom = set([i for i in range(int(j[0]),int(j[1]))])
-            x_top = set([i for i in range(int(unfix_point[0]),int(unfix_point[1]))])
-            # creat y set
-            y_bottom = set([i for i in range(int(j[2]),int(j[3]))])
-            y_top = set([i for i in range(int(unfix_point[2]),int(unfix_point[3]))])
-            # find intersection on x set and y set.
-            if len(x_bottom & x_top) != 0 and len(y_bottom & y_top) != 0 :
-                z_.append([float(j[4]),float(j[5])])
-        top_depth = unfix_point[5] - unfix_point[4]
-        # find diff set on z_.
-        z_ = sorted(z_, key = lambda z_ : z_[1])
-        for j in range(len(z_)-1):
-            if z_[j+1][0] -z_[j][1] >= top_depth:
-                return z_[j][1]
-        return unfix_point[4]
+        return self.fixPosition(unfix_point,Axis.DEPTH,self.depth)
 
 
     def checkWidth(self,unfix_point):
         ''' fix item position x ''' 
-        x_ = [[0,0],[float(self.width),float(self.width)]]
-        for j in self.fit_items:
-            # creat z set
-            z_bottom = set([i for i in range(int(j[4]),int(j[5]))])
-            z_top = set([i for i in range(int(unfix_point[4]),int(unfix_point[5]))])
-            # creat y set
-            y_bottom = set([i for i in range(int(j[2]),int(j[3]))])
-            y_top = set([i for i in range(int(unfix_point[2]),int(unfix_point[3]))])
-            # find intersection on z set and y set.
-            if len(z_bottom & z_top) != 0 and len(y_bottom & y_top) != 0 :
-                x_.append([float(j[0]),float(j[1])])
-        top_width = unfix_point[1] - unfix_point[0]
-        # find diff set on x_bottom and x_top.
-        x_ = sorted(x_,key = lambda x_ : x_[1])
-        for j in range(len(x_)-1):
-            if x_[j+1][0] -x_[j][1] >= top_width:
-                return x_[j][1]
-        return unfix_point[0]
+        return self.fixPosition(unfix_point,Axis.WIDTH,self.width)
     
 
     def checkHeight(self,unfix_point):
         '''fix item position y '''
-        y_ = [[0,0],[float(self.height),float(self.height)]]
-        for j in self.fit_items:
-            # creat x set
-            x_bottom = set([i for i in range(int(j[0]),int(j[1]))])
-            x_top = set([i for i in range(int(unfix_point[0]),int(unfix_point[1]))])
-            # creat z set
-            z_bottom = set([i for i in range(int(j[4]),int(j[5]))])
-            z_top = set([i for i in range(int(unfix_point[4]),int(unfix_point[5]))])
-            # find intersection on x set and z set.
-            if len(x_bottom & x_top) != 0 and len(z_bottom & z_top) != 0 :
-                y_.append([float(j[2]),float(j[3])])
-        top_height = unfix_point[3] - unfix_point[2]
-        # find diff set on y_bottom and y_top.
-        y_ = sorted(y_,key = lambda y_ : y_[1])
-        for j in range(len(y_)-1):
-            if y_[j+1][0] -y_[j][1] >= top_height:
-                return y_[j][1]
-
-        return unfix_point[2]
+        return self.fixPosition(unfix_point,Axis.HEIGHT,self.height)
 
 
     def addCorner(self):
         '''add container coner '''
         if self.corner != 0 :
-            corner = set2Decimal(self.corner)
+            corner = set2Number(self.corner)
             corner_list = []
             for i in range(8):
                 a = Item(
@@ -322,26 +389,43 @@ class Bin:
             return corner_list
 
 
+    def putPlacedItem(self, item, position):
+        ''' put item at position as it is, e.g. where an earlier pack left it, so packing only fills the space around it '''
+        item.position = list(position)
+        item.rotation_type = RotationType.RT_WHD
+        self.items.append(Placement(item, tuple(item.position), item.rotation_type))
+        self.total_weight += item.weight
+        [x,y,z] = item.position
+        [w,h,d] = item.getDimension()
+        self.addFitItem([x,x+w,y,y+h,z,z+d])
+
+
     def putCorner(self,info,item):
         '''put coner in bin '''
         fit = False
-        x = set2Decimal(self.width - self.corner)
-        y = set2Decimal(self.height - self.corner)
-        z = set2Decimal(self.depth - self.corner)
+        x = set2Number(self.width - self.corner)
+        y = set2Number(self.height - self.corner)
+        z = set2Number(self.depth - self.corner)
         pos = [[0,0,0],[0,0,z],[0,y,z],[0,y,0],[x,y,0],[x,0,0],[x,0,z],[x,y,z]]
         item.position = pos[info]
-        self.items.append(item)
+        self.items.append(Placement(item, tuple(item.position), item.rotation_type))
+        self.total_weight += item.weight
 
         corner = [float(item.position[0]),float(item.position[0])+float(self.corner),float(item.position[1]),float(item.position[1])+float(self.corner),float(item.position[2]),float(item.position[2])+float(self.corner)]
 
-        self.fit_items = np.append(self.fit_items,np.array([corner]),axis=0)
+        self.addFitItem(corner)
         return
 
 
     def clearBin(self):
         ''' clear item which in bin '''
         self.items = []
-        self.fit_items = np.array([[0,self.width,0,self.height,0,0]])
+        self.total_weight = 0
+        # keep the buffer, only the floor row stays in use
+        self.fit_buffer[0] = [0,self.width,0,self.height,0,0]
+        self.fit_count = 1
+        self.index.clear()
+        self.extreme_points.clear()
         return
 
 
@@ -354,6 +438,9 @@ class Packer:
         self.unfit_items = []
         self.total_items = 0
         self.binding = []
+        # set by pack: whether time_limit ran out, and the share of the bins packed
+        self.timed_out = False
+        self.progress = 0
         # self.apex = []
 
 
@@ -369,24 +456,42 @@ class Packer:
         return self.items.append(item)
 
 
-    def pack2Bin(self, bin, item,fix_point,check_stable,support_surface_ratio):
+    def pack2Bin(self, bin, item,fix_point,check_stable,support_surface_ratio,pivot_strategy=PivotStrategy.CORNERS):
         ''' pack item to bin '''
         fitted = False
         bin.fix_point = fix_point
         bin.check_stable = check_stable
         bin.support_surface_ratio = support_surface_ratio
+        extreme_points = pivot_strategy == PivotStrategy.EXTREME_POINTS
 
         # first put item on (0,0,0) , if corner exist ,first add corner in box. 
         if bin.corner != 0 and not bin.items:
             corner_lst = bin.addCorner()
             for i in range(len(corner_lst)) :
                 bin.putCorner(i,corner_lst[i])
+                if extreme_points:
+                    bin.addExtremePoints()
 
         elif not bin.items:
             response = bin.putItem(item, item.position)
 
             if not response:
                 bin.unfitted_items.append(item)
+            elif extreme_points:
+                bin.addExtremePoints()
+            return
+
+        # too heavy for what is left of max_weight, no pivot can take it
+        if not bin.fitWeight(item):
+            bin.unfitted_items.append(item)
+            return
+
+        if extreme_points:
+            for pivot in bin.extreme_points.pivots():
+                if bin.putItem(item, pivot):
+                    bin.addExtremePoints()
+                    return
+            bin.unfitted_items.append(item)
             return
 
         for axis in range(0, 3):
@@ -440,6 +545,23 @@ class Packer:
         return
 
 
+    def searchPack(self, iterations=32, time_limit=None, workers=1, seed=0, **kwargs):
+        '''
+        pack with the best of several item orderings, see search.searchOrder.
+        the best ordering's packing is kept as it is, so with time_limit nothing is packed after the search.
+        kwargs are passed on to pack, returns the score of the ordering used, None if no ordering was packed in time.
+        '''
+        # search imports this module
+        from .search import searchOrder, keepPacking
+        score, packing = searchOrder(self, iterations, time_limit, workers, seed, kwargs)
+        if packing is None:
+            # no time left for any ordering, every item is left unfit
+            self.pack(**dict(kwargs, time_limit=0))
+        else:
+            keepPacking(self, packing)
+        return score
+
+
     def putOrder(self):
         '''Arrange the order of items '''
         r = []
@@ -477,24 +599,9 @@ class Packer:
 
             x_st = int(i.position[0])
             y_st = int(i.position[1])
-            if i.rotation_type == 0:
-                x_ed = int(i.position[0] + i.width)
-                y_ed = int(i.position[1] + i.height)
-            elif i.rotation_type == 1:
-                x_ed = int(i.position[0] + i.height)
-                y_ed = int(i.position[1] + i.width)
-            elif i.rotation_type == 2:
-                x_ed = int(i.position[0] + i.height)
-                y_ed = int(i.position[1] + i.depth)
-            elif i.rotation_type == 3:
-                x_ed = int(i.position[0] + i.depth)
-                y_ed = int(i.position[1] + i.height)
-            elif i.rotation_type == 4:
-                x_ed = int(i.position[0] + i.depth)
-                y_ed = int(i.position[1] + i.width)
-            elif i.rotation_type == 5:
-                x_ed = int(i.position[0] + i.width)
-                y_ed = int(i.position[1] + i.depth)
+            dimension = i.getDimension()
+            x_ed = int(i.position[0] + dimension[0])
+            y_ed = int(i.position[1] + dimension[1])
 
             x_set = set(range(x_st,int(x_ed)+1))
             y_set = set(range(y_st,y_ed+1))
@@ -542,8 +649,14 @@ class Packer:
         return result
 
 
-    def pack(self, bigger_first=False,distribute_items=True,fix_point=True,check_stable=True,support_surface_ratio=0.75,binding=[],number_of_decimals=DEFAULT_NUMBER_OF_DECIMALS):
-        '''pack master func '''
+    def pack(self, bigger_first=False,distribute_items=True,fix_point=True,check_stable=True,support_surface_ratio=0.75,binding=[],number_of_decimals=DEFAULT_NUMBER_OF_DECIMALS,pivot_strategy=PivotStrategy.CORNERS,time_limit=None,sort_items=True):
+        '''
+        pack master func, pivot_strategy is one of PivotStrategy.ALL.
+        time_limit in seconds stops packing once it is used up, items not packed by then are unfit.
+        sort_items=False packs the items in the order they were added.
+        '''
+        if pivot_strategy not in PivotStrategy.ALL:
+            raise ValueError('unknown pivot_strategy {!r}'.format(pivot_strategy))
         # set decimals
         for bin in self.bins:
             bin.formatNumbers(number_of_decimals)
@@ -555,48 +668,65 @@ class Packer:
         # Bin : sorted by volumn
         self.bins.sort(key=lambda bin: bin.getVolume(), reverse=bigger_first)
         # Item : sorted by volumn -> sorted by loadbear -> sorted by level -> binding
-        self.items.sort(key=lambda item: item.getVolume(), reverse=bigger_first)
-        # self.items.sort(key=lambda item: item.getMaxArea(), reverse=bigger_first)
-        self.items.sort(key=lambda item: item.loadbear, reverse=True)
-        self.items.sort(key=lambda item: item.level, reverse=False)
+        if sort_items:
+            self.items.sort(key=lambda item: item.getVolume(), reverse=bigger_first)
+            # self.items.sort(key=lambda item: item.getMaxArea(), reverse=bigger_first)
+            self.items.sort(key=lambda item: item.loadbear, reverse=True)
+            self.items.sort(key=lambda item: item.level, reverse=False)
         # sorted by binding
         if binding != []:
             self.sortBinding(bin)
 
+        deadline = None if time_limit is None else time.monotonic() + time_limit
+        self.timed_out = False
+        self.progress = 0
         for idx,bin in enumerate(self.bins):
+            # items put in before packing (see putPlacedItem) did not come from self.items
+            pre_placed = set(id(placement.item) for placement in bin.items)
             # pack item to bin
-            for item in self.items:
-                self.pack2Bin(bin, item, fix_point, check_stable, support_surface_ratio)
+            for tried,item in enumerate(self.items):
+                if deadline is not None and time.monotonic() >= deadline:
+                    self.timed_out = True
+                    self.progress = (idx + tried / len(self.items)) / len(self.bins)
+                    break
+                self.pack2Bin(bin, item, fix_point, check_stable, support_surface_ratio, pivot_strategy)
 
-            if binding != []:
+            if binding != [] and not self.timed_out:
                 # resorted
                 self.items.sort(key=lambda item: item.getVolume(), reverse=bigger_first)
                 self.items.sort(key=lambda item: item.loadbear, reverse=True)
                 self.items.sort(key=lambda item: item.level, reverse=False)
                 # clear bin
-                bin.items = []
+                bin.clearBin()
                 bin.unfitted_items = self.unfit_items
-                bin.fit_items = np.array([[0,bin.width,0,bin.height,0,0]])
                 # repacking
                 for item in self.items:
-                    self.pack2Bin(bin, item,fix_point,check_stable,support_surface_ratio)
-            
+                    self.pack2Bin(bin, item,fix_point,check_stable,support_surface_ratio,pivot_strategy)
+        
             # Deviation Of Cargo Gravity Center 
             # self.bins[idx].gravity = self.gravityCenter(bin)
 
             if distribute_items :
-                for bitem in bin.items:
-                    no = bitem.partno
-                    for item in self.items :
-                        if item.partno == no :
-                            self.items.remove(item)
-                            break
+                # drop the first remaining item for every partno packed into the bin, in one pass
+                placed = Counter(bitem.partno for bitem in bin.items if id(bitem.item) not in pre_placed)
+                remaining = []
+                for item in self.items :
+                    if placed[item.partno] > 0 :
+                        placed[item.partno] -= 1
+                    else :
+                        remaining.append(item)
+                self.items[:] = remaining
+
+            if self.timed_out:
+                break
+        else :
+            self.progress = 1
 
         # put order of items
         self.putOrder()
 
         if self.items != []:
-            self.unfit_items = copy.deepcopy(self.items)
+            self.unfit_items = self.items
             self.items = []
         # for item in self.items.copy():
         #     if item in bin.unfitted_items:
@@ -0,0 +1,157 @@
+import copy
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from .main import Packer, Placement
+
+# bins, items and pack options of a worker process, set once by initSearch
+_search = {}
+
+
+def scorePacking(packer, items, levels):
+    ''' placed volume of items per level, most important (lowest) level first, then the total '''
+    ids = set(map(id, items))
+    placed = dict.fromkeys(levels, 0)
+    for bin in packer.bins:
+        for p in bin.items:
+            if id(p.item) in ids:
+                placed[p.level] += float(p.getVolume())
+    return tuple(placed[level] for level in levels) + (sum(placed.values()),)
+
+
+def packOrder(bins, items, order, kwargs):
+    '''
+    pack copies of bins and items, items in order or sorted the usual way if order is None.
+    returns (score, packing), score None if pack timed out, packing being what keepPacking needs to take the packed copies over.
+    '''
+    bins, items = copy.deepcopy((bins, items))
+    # where every copy packed came from: ('item', index in items) or ('placed', bin index, index in the bin's items)
+    keys = dict((id(item), ('item', i)) for i, item in enumerate(items))
+    for b, bin in enumerate(bins):
+        for j, p in enumerate(bin.items):
+            keys[id(p.item)] = ('placed', b, j)
+    indexes = dict((id(bin), b) for b, bin in enumerate(bins))
+    packer = Packer()
+    for bin in bins:
+        packer.addBin(bin)
+    for i in (range(len(items)) if order is None else order):
+        packer.addItem(items[i])
+    packer.pack(sort_items=order is None, **kwargs)
+    score = None if packer.timed_out else scorePacking(packer, items, sorted(set(item.level for item in items)))
+    packing = {
+        'bins': bins,
+        'order': [indexes[id(bin)] for bin in packer.bins],
+        'placements': [[(keys.get(id(p.item)), p) for p in bin.items] for bin in bins],
+        'unfitted': [[(keys.get(id(item)), item) for item in bin.unfitted_items] for bin in bins],
+        'unfit': [(keys.get(id(item)), item) for item in packer.unfit_items],
+        'timed_out': packer.timed_out,
+        'progress': packer.progress,
+    }
+    return score, packing
+
+
+def copyState(target, source):
+    ''' copy every slot of source onto target '''
+    for name in type(target).__slots__:
+        setattr(target, name, getattr(source, name))
+
+
+def keepPacking(packer, packing):
+    '''
+    leave packer as if it had packed itself the way packing (from packOrder on packer's bins and items) did,
+    with the caller's Bin and Item objects in place of the copies.
+    '''
+    bins = list(packer.bins)
+    originals = {'item': list(packer.items), 'placed': [[p.item for p in bin.items] for bin in bins]}
+
+    def original(key, item):
+        # corners are made while packing, they have no original
+        if key is None:
+            return item
+        target = originals['item'][key[1]] if key[0] == 'item' else originals['placed'][key[1]][key[2]]
+        copyState(target, item)
+        return target
+
+    for bin, packed, placements, unfitted in zip(bins, packing['bins'], packing['placements'], packing['unfitted']):
+        copyState(bin, packed)
+        bin.items = [Placement(original(key, p.item), p.position, p.rotation_type) for key, p in placements]
+        bin.unfitted_items = [original(key, item) for key, item in unfitted]
+    packer.bins = [bins[b] for b in packing['order']]
+    packer.items = []
+    packer.unfit_items = [original(key, item) for key, item in packing['unfit']]
+    packer.timed_out = packing['timed_out']
+    packer.progress = packing['progress']
+
+
+def initSearch(bins, items, kwargs):
+    ''' worker: keep the unpacked bins and items for every packSearch call '''
+    _search.update(bins=bins, items=items, kwargs=kwargs)
+
+
+def packSearch(order, time_limit):
+    ''' worker: score one ordering '''
+    return packOrder(_search['bins'], _search['items'], order, dict(_search['kwargs'], time_limit=time_limit))
+
+
+def groupedOrder(items, shuffle):
+    ''' item indexes by level, then loadbear, as pack sorts them, each group reordered by shuffle '''
+    groups = {}
+    for i, item in enumerate(items):
+        groups.setdefault((item.level, -item.loadbear), []).append(i)
+    order = []
+    for key in sorted(groups):
+        order += shuffle(groups[key])
+    return order
+
+
+def searchOrder(packer, iterations, time_limit, workers, seed, kwargs):
+    '''
+    multi-start search over item orderings for packer, which has not been packed yet.
+    candidate 0 is the usual sort, 1 is largest volume first within each priority group,
+    the rest shuffle the items within their priority group. the best ordering places the most
+    volume at the most important level, then the next level and so on, earlier candidates win ties.
+    stops after iterations candidates or when time_limit seconds are used up, candidates still
+    packing then are dropped, unless none finished: the usual sort is then kept as far as it got.
+    returns (score, packing of the best ordering as packOrder gives it, None if no candidate was started).
+    '''
+    deadline = None if time_limit is None else time.monotonic() + time_limit
+    rnd = random.Random(seed)
+    items = packer.items
+    volumes = [item.getVolume() for item in items]
+
+    def candidate(k):
+        if k == 0:
+            return None
+        if k == 1:
+            return groupedOrder(items, lambda group: sorted(group, key=lambda i: volumes[i], reverse=True))
+        return groupedOrder(items, lambda group: rnd.sample(group, len(group)))
+
+    def remaining():
+        return None if deadline is None else max(deadline - time.monotonic(), 0)
+
+    best = (None, None)
+    candidates = (candidate(k) for k in range(max(iterations, 1)))
+    batch = max(workers, 1)
+    # spawned like main.py's placement workers, forked ones would inherit the caller's threads
+    executor = ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context('spawn'), initializer=initSearch, initargs=(packer.bins, items, kwargs)
+    ) if workers > 1 else None
+    try:
+        while deadline is None or time.monotonic() < deadline:
+            orders = [order for _, order in zip(range(batch), candidates)]
+            if not orders:
+                break
+            if executor is None:
+                results = [packOrder(packer.bins, items, orders[0], dict(kwargs, time_limit=remaining()))]
+            else:
+                limit = remaining()
+                results = list(executor.map(packSearch, orders, [limit] * len(orders)))
+            for score, packing in results:
+                # the first candidate is kept even if it timed out, as the packing to fall back on
+                if best[1] is None or (score is not None and (best[0] is None or score > best[0])):
+                    best = (score, packing)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    return best
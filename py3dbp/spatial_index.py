@@ -0,0 +1,67 @@
+'''
+Uniform grid over the boxes placed in a Bin, Bin.putItem asks it whether a candidate collides with anything.
+
+A candidate is only compared with the boxes listed in the grid cells it covers, in plain Python, instead of
+with every row of Bin.fit_items in one NumPy broadcast: a bin cell holds ~15 boxes, which Python scans in
+2-10us while a broadcast call costs 15-35us, and broadcasting every pivot against every placed box was
+4-5x slower on 1500 items. Boxes that only touch at a face do not collide, as with auxiliary_methods.intersect.
+'''
+from collections import defaultdict
+
+# number of grid cells along each axis of a bin
+DEFAULT_GRID_CELLS = 8
+
+
+class SpatialGrid:
+
+    def __init__(self, width, height, depth, cells=DEFAULT_GRID_CELLS):
+        ''' uniform grid over the boxes placed in a bin '''
+        self.cell_size = [
+            max(float(width) / cells, 1.0),
+            max(float(height) / cells, 1.0),
+            max(float(depth) / cells, 1.0),
+        ]
+        self.clear()
+
+
+    def clear(self):
+        ''' drop every box from the grid '''
+        self.boxes = {}
+        self.cells = defaultdict(list)
+
+
+    def _cellRange(self, lo, hi, axis):
+        ''' grid cells covered by [lo, hi] on one axis '''
+        size = self.cell_size[axis]
+        return range(int(float(lo) // size), int(float(hi) // size) + 1)
+
+
+    def _cells(self, box):
+        ''' all grid cells covered by box (x0, x1, y0, y1, z0, z1) '''
+        for i in self._cellRange(box[0], box[1], 0):
+            for j in self._cellRange(box[2], box[3], 1):
+                for k in self._cellRange(box[4], box[5], 2):
+                    yield (i, j, k)
+
+
+    def insert(self, idx, box):
+        ''' register box (x0, x1, y0, y1, z0, z1) under idx '''
+        box = tuple(box)
+        self.boxes[idx] = box
+        for cell in self._cells(box):
+            self.cells[cell].append(idx)
+
+
+    def intersects(self, box):
+        ''' True if box (x0, x1, y0, y1, z0, z1) overlaps any box in the grid '''
+        x0, x1, y0, y1, z0, z1 = box
+        seen = set()
+        for cell in self._cells(box):
+            for idx in self.cells.get(cell, ()):
+                if idx in seen:
+                    continue
+                seen.add(idx)
+                b = self.boxes[idx]
+                if b[0] < x1 and x0 < b[1] and b[2] < y1 and y0 < b[3] and b[4] < z1 and z0 < b[5]:
+                    return True
+        return False
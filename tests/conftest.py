@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from py3dbp import Bin, Item
+
+
+def make_item(partno, WHD, weight=1, level=1, updown=True):
+    ''' a cube-typed cargo box like the ones calculate_placements packs '''
+    return Item(partno=partno, name='item{}'.format(partno), typeof='cube', WHD=WHD, weight=weight,
+                level=level, loadbear=100, updown=updown, color='#0000E3')
+
+
+def make_bin(partno, WHD, max_weight=10000, number_of_decimals=0):
+    ''' a bin with its numbers formatted, as Packer.pack leaves it '''
+    bin = Bin(partno=partno, WHD=WHD, max_weight=max_weight, put_type=1)
+    bin.formatNumbers(number_of_decimals)
+    return bin
+
+
+def reset_state(main):
+    ''' empties the state of main.py in memory, as a fresh server process starts with it '''
+    for name in (
+        'defined_containers', 'zone_wise_containers', 'current_stowage_state', 'current_item_state', 'item_properties',
+        'usage_log', 'placement_cache', 'placement_jobs', 'retrieval_index_ids', 'retrieval_index_names', 'retrieval_index_containers',
+    ):
+        getattr(main, name).clear()
+    for name in ('items_ids_to_place', 'empty_container_ids', 'activity_log', 'waste_items'):
+        getattr(main, name)[:] = []
+    main.placement_cache_stats.update(hits=0, misses=0)
+    if main.state_log['file'] is not None:
+        main.state_log['file'].close()
+    main.state_log.update(seq=0, file=None, size=0, loaded=False, snapshotted=False, snapshotting=False)
+
+
+@pytest.fixture
+def main(monkeypatch):
+    ''' main.py with an empty in-memory state, not kept on disk '''
+    import main
+    monkeypatch.setattr(main, 'STATE_DIR', None)
+    monkeypatch.setattr(main, 'PLACEMENT_WORKERS', 1)
+    reset_state(main)
+    yield main
+    reset_state(main)
@@ -0,0 +1,35 @@
+from decimal import Decimal
+
+from py3dbp import Packer
+from py3dbp.auxiliary_methods import set2Decimal, set2Number
+
+from conftest import make_bin, make_item
+
+
+def test_set2number_gives_ints_with_no_decimals():
+    assert set2Number(7) == 7 and type(set2Number(7)) is int
+    assert set2Number(7.0) == 7 and type(set2Number(7.0)) is int
+    assert type(set2Number(Decimal('3.2'))) is int
+    assert type(set2Number('4')) is int
+
+
+def test_set2number_rounds_like_decimal_quantize():
+    for value in (0.5, 1.5, 2.5, -0.5, 2.4999, 2.5001, 10.5, Decimal('3.5')):
+        assert set2Number(value) == int(set2Decimal(value)), value
+
+
+def test_set2number_keeps_decimals():
+    assert set2Number(1.25, 1) == set2Decimal(1.25, 1)
+    assert isinstance(set2Number(1.25, 1), Decimal)
+
+
+def test_pack_with_no_decimals_works_in_ints():
+    packer = Packer()
+    packer.addBin(make_bin('bin', (50.0, 50.0, 50.0)))
+    packer.addItem(make_item(1, (10.4, 20.6, 5.5), weight=2.5))
+    packer.addItem(make_item(2, (10, 10, 10)))
+    packer.pack(fix_point=False, check_stable=False)
+    box = packer.bins[0]
+    assert all(type(v) is int for v in (box.width, box.height, box.depth, box.getVolume(), box.getTotalWeight()))
+    for p in box.items:
+        assert all(type(v) is int for v in list(p.position) + list(p.getDimension()))
@@ -0,0 +1,59 @@
+import random
+
+import numpy as np
+import pytest
+
+from py3dbp import Packer, Bin
+from py3dbp.auxiliary_methods import intersect
+from py3dbp.constants import PivotStrategy
+from py3dbp.extreme_points import ExtremePoints
+
+from conftest import make_item
+
+
+def pack_random(count, pivot_strategy, seed=0):
+    ''' the bin of a pack of count random boxes into a 100^3 bin '''
+    rnd = random.Random(seed)
+    packer = Packer()
+    bin = Bin(partno='bin', WHD=(100, 100, 100), max_weight=10000)
+    packer.addBin(bin)
+    for i in range(count):
+        packer.addItem(make_item(i, (rnd.randint(5, 40), rnd.randint(5, 40), rnd.randint(5, 40))))
+    packer.pack(fix_point=False, check_stable=False, pivot_strategy=pivot_strategy)
+    return bin
+
+
+def test_first_box_projects_its_far_corners():
+    points = ExtremePoints(100, 100, 100)
+    box = (0, 10, 0, 20, 0, 30)
+    points.insert(box, np.array([[0, 100, 0, 100, 0, 0], box], dtype=float))
+    assert points.pivots() == [[10, 0, 0], [0, 20, 0], [0, 0, 30]]
+
+
+def test_points_stay_valid_as_boxes_are_placed():
+    bin = pack_random(200, PivotStrategy.EXTREME_POINTS)
+    assert bin.items
+    keys = bin.extreme_points.keys
+    assert keys == sorted(set(keys))
+    for x, y, z in bin.extreme_points.pivots():
+        assert 0 <= x < 100 and 0 <= y < 100 and 0 <= z < 100
+        for p in bin.items:
+            px, py, pz = p.position
+            w, h, d = p.getDimension()
+            assert not (px <= x < px + w and py <= y < py + h and pz <= z < pz + d)
+
+
+def test_extreme_point_packing_has_no_overlaps():
+    bin = pack_random(200, PivotStrategy.EXTREME_POINTS)
+    assert not any(intersect(a, b) for i, a in enumerate(bin.items) for b in bin.items[i + 1:])
+
+
+def test_clear_bin_resets_the_points():
+    bin = pack_random(20, PivotStrategy.EXTREME_POINTS)
+    bin.clearBin()
+    assert bin.extreme_points.pivots() == [[0, 0, 0]]
+
+
+def test_unknown_pivot_strategy_is_rejected():
+    with pytest.raises(ValueError):
+        pack_random(1, 'nearest')
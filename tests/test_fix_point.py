@@ -0,0 +1,47 @@
+import random
+
+import numpy as np
+
+from py3dbp.auxiliary_methods import overlapLength
+
+from conftest import make_bin
+
+
+def set_fix_position(fit_items, unfix_point, axis, size):
+    ''' checkWidth/checkHeight/checkDepth as they were written with set(range()) overlaps '''
+    a, b = [i for i in range(3) if i != axis]
+    spans = [[0, 0], [float(size), float(size)]]
+    for j in fit_items:
+        if (set(range(int(j[2*a]), int(j[2*a+1]))) & set(range(int(unfix_point[2*a]), int(unfix_point[2*a+1]))) and
+                set(range(int(j[2*b]), int(j[2*b+1]))) & set(range(int(unfix_point[2*b]), int(unfix_point[2*b+1])))):
+            spans.append([float(j[2*axis]), float(j[2*axis+1])])
+    top = unfix_point[2*axis+1] - unfix_point[2*axis]
+    spans = sorted(spans, key=lambda span: span[1])
+    for j in range(len(spans) - 1):
+        if spans[j+1][0] - spans[j][1] >= top:
+            return spans[j][1]
+    return unfix_point[2*axis]
+
+
+def test_overlap_length_counts_whole_units_like_sets():
+    rnd = random.Random(0)
+    los = np.array([rnd.uniform(0, 50) for _ in range(200)])
+    his = los + np.array([rnd.uniform(0, 30) for _ in range(200)])
+    for _ in range(50):
+        lo = rnd.randint(0, 50)
+        hi = lo + rnd.randint(0, 30)
+        expected = [len(set(range(lo, hi)) & set(range(int(l), int(h)))) for l, h in zip(los, his)]
+        assert overlapLength(lo, hi, los, his).tolist() == expected
+
+
+def test_fix_position_matches_the_set_version():
+    rnd = random.Random(1)
+    for trial in range(100):
+        bin = make_bin('bin', (60, 60, 60))
+        for _ in range(rnd.randint(0, 25)):
+            x, y, z = (rnd.uniform(0, 50) for _ in range(3))
+            bin.addFitItem([x, x + rnd.uniform(1, 20), y, y + rnd.uniform(1, 20), z, z + rnd.uniform(1, 20)])
+        x, y, z = (float(rnd.randint(0, 50)) for _ in range(3))
+        unfix_point = [x, x + rnd.randint(1, 20), y, y + rnd.randint(1, 20), z, z + rnd.randint(1, 20)]
+        for check, axis, size in ((bin.checkWidth, 0, 60), (bin.checkHeight, 1, 60), (bin.checkDepth, 2, 60)):
+            assert check(unfix_point) == set_fix_position(bin.fit_items, unfix_point, axis, size), (trial, axis)
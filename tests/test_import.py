@@ -0,0 +1,146 @@
+import io
+import json
+
+import pandas as pd
+
+from benchmarks.bench_import import manifests
+from conftest import reset_state
+
+
+# rows that do not convert, repeated ids and empty cells, after rows that all read as numbers
+BAD_CONTAINERS = ['Z1,C0,10,10,10', 'Z1,CX,wide,10,10', 'Z2,CY,10,deep,10', ',CZ,5.5,10,10']
+BAD_ITEMS = [
+    '1,again,5,5,5,1.0,1,N/A,1,Z1',
+    '9001,wide,abc,5,5,1.0,1,N/A,1,Z1',
+    '9002,light,5,5,5,,1,N/A,1,Z1',
+    '9003,most,5,5,5,1.0,2.7,N/A,,Z1',
+    '9004,utc,5,5,5,1.0,3,2025-05-20T00:00:00Z,2,',
+    '9005,nodate,5,5,5,1.0,3,,bad,Z2',
+]
+
+
+def csv_texts(rows=300):
+    containers, items = manifests(rows)
+    return '\n'.join([containers] + BAD_CONTAINERS), '\n'.join([items] + BAD_ITEMS)
+
+
+def post_csv(main, kind, text, **query):
+    return main.app.test_client().post('/api/import/' + kind, query_string=query, content_type='multipart/form-data',
+                                       data={'file': (io.BytesIO(text.encode()), 'manifest.csv')})
+
+
+def streamed(response):
+    ''' (errors of every chunk, summary line) of an NDJSON import response '''
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    errors = [error for line in lines if line.get('phase') == 'import' for error in line['errors']]
+    return errors, lines[-1]
+
+
+def imported(main):
+    return (main.defined_containers.copy(), {zone: ids[:] for zone, ids in main.zone_wise_containers.items()},
+            main.item_properties.copy(), main.items_ids_to_place[:])
+
+
+def row_by_row(main, containers, items):
+    ''' the state and errors of converting and adding the rows one at a time, as the import did before it went by columns '''
+    errors = []
+    df = pd.read_csv(io.StringIO(containers))
+    for index, row in df.iterrows():
+        container_dict = row.to_dict()
+        try:
+            container_dict['zone'] = str(container_dict.get('zone'))
+            container_dict['width'] = float(container_dict.pop('width_cm'))
+            container_dict['depth'] = float(container_dict.pop('depth_cm'))
+            container_dict['height'] = float(container_dict.pop('height_cm'))
+            container_dict['containerId'] = container_dict.pop('container_id')
+            if main.defined_containers.get(container_dict['containerId']):
+                continue
+            main.record_event('containers', [container_dict])
+        except (ValueError, TypeError) as e:
+            errors.append({'row': index + 2, 'message': f'Invalid numeric data: {e}'})
+    df = pd.read_csv(io.StringIO(items))
+    main.rename_item_columns(df)
+    for index, row in df.iterrows():
+        item_dict = {k: (v if pd.notna(v) else None) for k, v in row.to_dict().items()}
+        try:
+            if main.item_properties.get(item_dict['itemId']):
+                continue
+            item_dict['name'] = str(item_dict.get('name', 'Unknown'))
+            item_dict['width'] = float(item_dict.get('width', 0.0))
+            item_dict['depth'] = float(item_dict.get('depth', 0.0))
+            item_dict['height'] = float(item_dict.get('height', 0.0))
+            item_dict['mass'] = float(item_dict.get('mass', 0.0))
+            item_dict['priority'] = int(item_dict.get('priority', 0))
+            item_dict['preferredZone'] = str(item_dict.pop('preferred_zone', 'default_zone'))
+            if item_dict.get('usage_limit') is not None: item_dict['usage_limit'] = int(item_dict['usage_limit'])
+            if item_dict.get('expiry_date') is not None: item_dict['expiry_date'] = main.parse_iso_datetime(item_dict['expiry_date'])
+            main.record_event('items', [item_dict], False)
+        except (ValueError, TypeError) as e:
+            errors.append({'row': index + 2, 'message': f'Invalid numeric/integer data: {e}'})
+    return imported(main), errors
+
+
+def test_column_import_matches_row_by_row(main):
+    containers, items = csv_texts()
+    expected, expected_errors = row_by_row(main, containers, items)
+    assert expected_errors
+    reset_state(main)
+    container_result = post_csv(main, 'containers', containers).get_json()
+    item_result = post_csv(main, 'items', items).get_json()
+    assert imported(main) == expected
+    assert container_result['errors'] + item_result['errors'] == expected_errors
+    assert (container_result['containersImported'], item_result['itemsImported']) == (len(expected[0]), len(expected[2]))
+
+
+def test_items_already_known_are_skipped(main):
+    containers, items = csv_texts()
+    post_csv(main, 'items', items)
+    before = imported(main)
+    result = post_csv(main, 'items', items).get_json()
+    assert result['itemsImported'] == 0 and result['errors']
+    assert imported(main) == before
+
+
+def test_import_that_fails_adds_no_rows(main):
+    items = '\n'.join(csv_texts(rows=3)[1].splitlines()[:4] + ['9006,endless,5,5,5,1.0,inf,N/A,1,Z1'])
+    assert post_csv(main, 'items', items).status_code == 500
+    assert main.item_properties == {} and main.items_ids_to_place == []
+
+
+def test_chunked_import_matches_one_go(main):
+    containers, items = csv_texts()
+    one_go_errors = post_csv(main, 'containers', containers).get_json()['errors'] + post_csv(main, 'items', items).get_json()['errors']
+    expected = imported(main)
+    # the bad rows are all in the last chunks, the first ones read every column as numbers
+    for chunk_size in (1, 7, 1000):
+        reset_state(main)
+        container_errors, container_summary = streamed(post_csv(main, 'containers', containers, stream=1, chunkSize=chunk_size))
+        item_errors, item_summary = streamed(post_csv(main, 'items', items, stream=1, chunkSize=chunk_size))
+        assert imported(main) == expected
+        assert container_errors + item_errors == one_go_errors
+        assert container_summary['success'] and item_summary['success']
+        assert item_summary['itemsImported'] == len(expected[2]) and item_summary['errors'] == len(item_errors)
+
+
+def test_chunked_import_places_each_chunk(main):
+    containers, items = csv_texts()
+    post_csv(main, 'containers', containers)
+    response = post_csv(main, 'items', items, stream=1, chunkSize=20, place=1)
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    placed = [line['itemsPlaced'] for line in lines if line.get('phase') == 'import']
+    assert len(placed) == 16 and placed[0] > 0
+    assert sum(placed) == len(main.current_item_state)
+    assert lines[-1]['success']
+
+
+def test_chunk_size_must_be_a_positive_number(main):
+    containers, _ = csv_texts()
+    assert post_csv(main, 'containers', containers, stream=1, chunkSize=0).status_code == 400
+    assert post_csv(main, 'containers', containers, stream=1, chunkSize='many').status_code == 400
+
+
+def test_chunked_import_keeps_the_chunks_before_a_failure(main):
+    items = '\n'.join(csv_texts(rows=3)[1].splitlines()[:4] + ['9006,endless,5,5,5,1.0,inf,N/A,1,Z1'])
+    errors, summary = streamed(post_csv(main, 'items', items, stream=1, chunkSize=2))
+    assert not summary['success'] and summary['itemsImported'] == 2
+    assert main.items_ids_to_place == [1, 2]
@@ -0,0 +1,153 @@
+import pytest
+
+from py3dbp import Packer
+from py3dbp.constants import RotationType
+from py3dbp.main import Placement
+
+from conftest import make_bin, make_item
+
+
+def formatted_item(partno, WHD, **kwargs):
+    ''' make_item with its numbers formatted, as Packer.pack leaves it '''
+    item = make_item(partno, WHD, **kwargs)
+    item.formatNumbers(0)
+    return item
+
+
+def test_bin_keeps_its_running_weight():
+    bin = make_bin('bin', (20, 20, 20), max_weight=10)
+    assert bin.putItem(formatted_item(1, (5, 5, 5), weight=4), [0, 0, 0])
+    assert bin.putItem(formatted_item(2, (5, 5, 5), weight=5), [5, 0, 0])
+    assert bin.getTotalWeight() == 9 == sum(p.weight for p in bin.items)
+    bin.clearBin()
+    assert bin.getTotalWeight() == 0
+
+
+def test_overweight_item_is_rejected_without_moving_it():
+    bin = make_bin('bin', (20, 20, 20), max_weight=10)
+    assert bin.putItem(formatted_item(1, (5, 5, 5), weight=8), [0, 0, 0])
+    heavy = formatted_item(2, (5, 5, 5), weight=3)
+    assert not bin.fitWeight(heavy)
+    assert not bin.putItem(heavy, [5, 0, 0])
+    assert heavy.position == [0, 0, 0]
+
+
+def test_pack_sends_overweight_items_to_the_next_bin():
+    packer = Packer()
+    packer.addBin(make_bin('light', (20, 20, 20), max_weight=5))
+    packer.addBin(make_bin('heavy', (30, 30, 30), max_weight=100))
+    packer.addItem(make_item(1, (5, 5, 5), weight=50))
+    packer.pack(fix_point=False, check_stable=False)
+    light, heavy = packer.bins
+    assert not light.items
+    assert [p.partno for p in heavy.items] == [1]
+    assert list(heavy.items[0].position) == [0, 0, 0]
+
+
+def test_placements_keep_where_the_item_was_put():
+    bin = make_bin('bin', (20, 20, 20))
+    item = formatted_item(1, (5, 10, 5))
+    assert bin.putItem(item, [0, 0, 0])
+    placement = bin.items[0]
+    assert isinstance(placement, Placement) and placement.item is item
+    # the packer moves the item on when it tries it elsewhere, the placement stays put
+    item.position = [7, 7, 7]
+    assert placement.position == (0, 0, 0)
+    assert (placement.partno, placement.name, placement.weight) == (1, 'item1', 1)
+    assert placement.getDimension() == item.getDimension(placement.rotation_type)
+
+
+def test_item_and_bin_have_no_instance_dict():
+    item = make_item(1, (5, 5, 5))
+    bin = make_bin('bin', (20, 20, 20))
+    for obj in (item, bin):
+        assert not hasattr(obj, '__dict__')
+        with pytest.raises(AttributeError):
+            obj.misspelt_attribute = 1
+
+
+# dimension of (w, h, d) = (1, 2, 3) per rotation type, as the if-chain getDimension used to give it
+ROTATED_123 = {
+    RotationType.RT_WHD: (1, 2, 3), RotationType.RT_HWD: (2, 1, 3), RotationType.RT_HDW: (2, 3, 1),
+    RotationType.RT_DHW: (3, 2, 1), RotationType.RT_DWH: (3, 1, 2), RotationType.RT_WDH: (1, 3, 2),
+}
+
+
+def test_rotation_table_matches_every_rotation_type():
+    item = make_item(1, (1, 2, 3))
+    for rotation_type, dimension in ROTATED_123.items():
+        assert tuple(item.getDimension(rotation_type)) == dimension
+    assert [rotation_type for rotation_type, _ in item.getRotations()] == RotationType.ALL
+    assert [rotation_type for rotation_type, _ in make_item(2, (1, 2, 3), updown=False).getRotations()] == RotationType.Notupdown
+
+
+def test_rotations_giving_the_same_box_are_tried_once():
+    assert len(make_item(1, (4, 4, 4)).getRotations()) == 1
+    assert len(make_item(2, (4, 4, 7)).getRotations()) == 3
+    assert [dimension for _, dimension in make_item(3, (4, 7, 4)).getRotations()] == [(4, 7, 4), (7, 4, 4), (4, 4, 7)]
+
+
+def test_rotation_table_is_built_on_first_use():
+    item = make_item(1, (1.4, 2, 3))
+    # not held by the many items a manifest creates that are never tried
+    assert item.dimensions is None and item.rotations is None
+    item.getDimension()
+    assert item.dimensions is not None
+    # formatNumbers changes the sizes, the table is built again from them
+    item.formatNumbers(0)
+    assert item.dimensions is None
+    assert item.getDimension() == (1, 2, 3)
+
+
+def test_fit_buffer_doubles_and_is_kept_by_clear_bin():
+    bin = make_bin('bin', (100, 100, 100))
+    rows = [[i, i + 1, 0, 1, 0, 1] for i in range(40)]
+    for row in rows:
+        bin.addFitItem(row)
+    assert bin.fit_items.tolist() == [[0, 100, 0, 100, 0, 0]] + rows
+    assert len(bin.fit_buffer) == 64
+    buffer = bin.fit_buffer
+    bin.clearBin()
+    assert bin.fit_buffer is buffer
+    assert bin.fit_items.tolist() == [[0, 100, 0, 100, 0, 0]]
+
+
+def test_distributed_items_leave_one_copy_per_placement():
+    packer = Packer()
+    packer.addBin(make_bin('small', (10, 10, 10)))
+    packer.addBin(make_bin('large', (10, 10, 20)))
+    for _ in range(4):
+        packer.addItem(make_item('same', (10, 10, 10)))
+    packer.addItem(make_item('other', (10, 10, 10)))
+    packer.pack(fix_point=False, check_stable=False)
+    small, large = packer.bins
+    assert [p.partno for p in small.items] == ['same']
+    assert [p.partno for p in large.items] == ['same', 'same']
+    assert sorted(item.partno for item in packer.unfit_items) == ['other', 'same']
+
+
+def test_pre_placed_items_are_formatted_like_packed_ones():
+    packer = Packer()
+    bin = make_bin('bin', (20.0, 20.0, 20.0))
+    placed = make_item('placed', (10.4, 20.0, 20.0))
+    bin.putPlacedItem(placed, (0.0, 0.0, 0.0))
+    packer.addBin(bin)
+    packer.addItem(make_item('new', (10, 20, 20)))
+    packer.pack(fix_point=False, check_stable=False)
+    first, second = bin.items
+    assert placed.getDimension() == (10, 20, 20) and all(type(n) is int for n in placed.getDimension())
+    assert first.position == (0, 0, 0) and all(type(n) is int for n in first.position)
+    assert bin.fit_items.tolist() == [[0, 20, 0, 20, 0, 0], [0, 10, 0, 20, 0, 20], [10, 20, 0, 20, 0, 20]]
+    assert (second.partno, second.position) == ('new', (10, 0, 0))
+
+
+def test_queued_item_sharing_a_pre_placed_partno_is_not_dropped():
+    packer = Packer()
+    bin = make_bin('bin', (20, 20, 20))
+    bin.putPlacedItem(make_item('a', (10, 20, 20)), (0, 0, 0))
+    packer.addBin(bin)
+    # the same id queued again, too big for the space left
+    packer.addItem(make_item('a', (20, 20, 20)))
+    packer.pack(fix_point=False, check_stable=False)
+    assert [p.partno for p in bin.items] == ['a']
+    assert [item.partno for item in packer.unfit_items] == ['a']
@@ -0,0 +1,104 @@
+import json
+import random
+import threading
+import time
+
+
+def manifest(zones, items_per_zone, containers_per_zone=1, size=100, seed=0):
+    ''' (containers, items) for /api/placement, spread evenly over zones Z0, Z1, ... '''
+    rnd = random.Random(seed)
+    containers = [
+        {'containerId': 'C{}-{}'.format(z, c), 'zone': 'Z{}'.format(z), 'width': size, 'depth': size, 'height': size}
+        for z in range(zones) for c in range(containers_per_zone)
+    ]
+    items = [
+        {'itemId': i, 'name': 'item{}'.format(i), 'width': rnd.randint(5, 30), 'depth': rnd.randint(5, 30), 'height': rnd.randint(5, 30),
+         'mass': rnd.randint(1, 20), 'priority': rnd.randint(1, 100), 'preferredZone': 'Z{}'.format(i % zones), 'usage_limit': 5, 'expiry_date': None}
+        for i in range(zones * items_per_zone)
+    ]
+    return containers, items
+
+
+def zone_jobs(zones, items_per_zone):
+    ''' pack_containers jobs, one per zone of manifest(zones, items_per_zone) '''
+    containers, items = manifest(zones, items_per_zone)
+    return [
+        ([(c['containerId'], (c['width'], c['height'], c['depth']), []) for c in containers if c['zone'] == zone],
+         [(item['itemId'], item) for item in items if item['preferredZone'] == zone])
+        for zone in sorted(set(c['zone'] for c in containers))
+    ]
+
+
+def test_zones_are_packed_in_one_reused_spawned_pool(main, monkeypatch):
+    monkeypatch.setattr(main, 'PLACEMENT_WORKERS', 2)
+    jobs = zone_jobs(3, 20)
+    try:
+        assert main.pack_jobs(jobs) == [main.pack_containers(*job) for job in jobs]
+        executor = main.placement_pool
+        assert executor._mp_context.get_start_method() == 'spawn'
+        assert main.pack_jobs(jobs[::-1]) == [main.pack_containers(*job) for job in jobs[::-1]]
+        assert main.placement_pool is executor
+    finally:
+        main.close_placement_pool()
+    assert main.placement_pool is None
+
+
+def test_one_worker_packs_in_this_process(main):
+    jobs = zone_jobs(2, 10)
+    assert main.pack_jobs(jobs) == [main.pack_containers(*job) for job in jobs]
+    assert main.placement_pool is None
+
+
+def test_repeated_request_is_answered_from_the_cache(main):
+    containers, items = manifest(2, 30)
+    client = main.app.test_client()
+    first = client.post('/api/placement', json={'items': items, 'containers': containers}).get_json()
+    again = client.post('/api/placement', json={'items': items, 'containers': containers}).get_json()
+    assert again['placements'] == first['placements']
+    assert len(main.current_item_state) == len(items) == len(again['placements'])
+    assert main.zone_wise_containers == {'Z0': ['C0-0'], 'Z1': ['C1-0']}
+    cache = client.get('/api/placement/cache').get_json()
+    assert (cache['hits'], cache['misses'], cache['size']) == (1, 1, 1)
+
+
+def test_changed_state_is_packed_again(main):
+    containers, items = manifest(2, 30)
+    client = main.app.test_client()
+    client.post('/api/placement', json={'items': items, 'containers': containers, 'incremental': True})
+    # another item queued, it has to be placed too
+    main.record_event('items', [dict(items[0], itemId=1000)], True)
+    client.post('/api/placement', json={'items': items, 'containers': containers, 'incremental': True})
+    assert 1000 in main.current_item_state
+    cache = client.get('/api/placement/cache').get_json()
+    assert (cache['hits'], cache['misses']) == (0, 2)
+
+
+def test_time_limit_is_shared_by_every_zone(main):
+    # about 0.12 s a zone untimed, each zone got the whole limit before
+    containers, items = manifest(8, 200, containers_per_zone=2)
+    time_limit = 0.2
+    start = time.time()
+    response = main.app.test_client().post('/api/placement', json={'items': items, 'containers': containers, 'timeLimit': time_limit}).get_json()
+    assert time.time() - start < time_limit + 0.25
+    assert response['timedOut'] and response['progress'] < 1
+
+
+def test_stream_sends_each_zone_as_soon_as_it_is_packed(main, monkeypatch):
+    containers, items = manifest(2, 10)
+    first_line_read = threading.Event()
+    pack_containers = main.pack_containers
+
+    def pack_zone_1_after_the_first_line(containers, items, time_limit=None):
+        if containers and containers[0][0] == 'C1-0':
+            assert first_line_read.wait(10)
+        return pack_containers(containers, items, time_limit)
+
+    monkeypatch.setattr(main, 'pack_containers', pack_zone_1_after_the_first_line)
+    response = main.app.test_client().post('/api/placement', json={'items': items, 'containers': containers, 'stream': True}, buffered=False)
+    lines = response.iter_encoded()
+    first = json.loads(next(lines))
+    first_line_read.set()
+    rest = [json.loads(line) for line in lines]
+    assert first['containerId'] == 'C0-0' and len(first['placements']) == 10
+    assert [line.get('containerId') for line in rest] == ['C1-0', None]
+    assert rest[-1]['success'] and rest[-1]['containers'] == 2
@@ -0,0 +1,40 @@
+from test_placement import manifest
+
+
+def run_job(client, data):
+    ''' the status of the placement job for data, once it has finished '''
+    job_id = client.post('/api/placement/jobs', json=data).get_json()['jobId']
+    status = {'status': 'queued', 'version': -1}
+    while status['status'] in ('queued', 'running'):
+        status = client.get('/api/placement/jobs/{}?wait=30&version={}'.format(job_id, status['version'])).get_json()
+    assert status['status'] == 'done', status
+    return status
+
+
+def test_job_reports_progress_and_placements(main):
+    containers, items = manifest(2, 20)
+    status = run_job(main.app.test_client(), {'items': items, 'containers': containers})
+    assert status['itemsTotal'] == len(items) == status['itemsPlaced'] == len(status['result']['placements'])
+    assert set(status['zones']) == {'Z0', 'Z1', 'leftover'} and all(zone['done'] for zone in status['zones'].values())
+
+
+def test_job_result_is_not_changed_by_later_state_changes(main):
+    containers, items = manifest(1, 10)
+    client = main.app.test_client()
+    job_id = run_job(client, {'items': items, 'containers': containers})['jobId']
+    placed = main.current_item_state[items[0]['itemId']]
+    placed['position']['startCoordinates']['width'] = -1
+    placed['reason'] = 'Expired'
+    result = client.get('/api/placement/jobs/{}'.format(job_id)).get_json()['result']
+    assert all(p['position']['startCoordinates']['width'] >= 0 and 'reason' not in p for p in result['placements'])
+
+
+def test_only_the_latest_job_results_are_kept(main, monkeypatch):
+    monkeypatch.setattr(main, 'PLACEMENT_JOB_RESULTS_KEPT', 1)
+    client = main.app.test_client()
+    containers, items = manifest(1, 5)
+    first = run_job(client, {'items': items, 'containers': containers})['jobId']
+    second = run_job(client, {'items': [dict(item, itemId=item['itemId'] + 100) for item in items], 'incremental': True})['jobId']
+    first, second = (client.get('/api/placement/jobs/{}'.format(job_id)).get_json() for job_id in (first, second))
+    assert (first['status'], first['result'], first['resultDropped']) == ('done', None, True)
+    assert second['result'] is not None and not second['resultDropped']
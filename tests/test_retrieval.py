@@ -0,0 +1,123 @@
+import random
+
+
+def box(start, end):
+    ''' a position dict from (width, height, depth) corners '''
+    return {
+        'startCoordinates': dict(zip(('width', 'height', 'depth'), map(float, start))),
+        'endCoordinates': dict(zip(('width', 'height', 'depth'), map(float, end))),
+    }
+
+
+def stow(main, container_id, placed, size=100):
+    ''' puts placed, [(itemId, name, start, end, mass)], into a new container as a placement would '''
+    main.record_event('containers', [{'containerId': container_id, 'zone': 'Z', 'width': size, 'depth': size, 'height': size}])
+    main.record_event('items', [{'itemId': item_id, 'name': name, 'mass': mass, 'usage_limit': 5} for item_id, name, _, _, mass in placed], False)
+    main.record_event('placed', [(container_id, [
+        {'itemId': item_id, 'name': name, 'containerId': container_id, 'position': box(start, end)} for item_id, name, start, end, _ in placed
+    ])])
+
+
+def moved(result):
+    return [step['itemId'] for step in result['retrievalSteps'] if step['action'] != 'retrieve']
+
+
+# height is the distance from the open face: an item is in the way of the ones behind it whose footprint it overlaps
+STACK = [
+    (1, 'front', (0, 0, 0), (10, 10, 10), 1),
+    (2, 'middle', (0, 10, 0), (10, 20, 10), 1),
+    (3, 'tool', (0, 20, 0), (10, 30, 10), 1),
+    (4, 'beside', (10, 0, 0), (20, 10, 10), 1),
+    (5, 'tool', (30, 10, 30), (40, 20, 40), 1),
+    (6, 'heavy', (30, 0, 30), (40, 10, 40), 50),
+]
+
+
+def test_search_finds_items_by_id_and_name(main):
+    stow(main, 'C', STACK)
+    client = main.app.test_client()
+    result = client.get('/api/search?itemId=2').get_json()
+    assert result['found'] and result['item']['containerId'] == 'C' and result['item']['name'] == 'middle'
+    assert moved(result) == [1]
+    assert client.get('/api/search?itemName=beside').get_json()['item']['itemId'] == 4
+    assert not client.get('/api/search?itemId=99').get_json()['found']
+
+
+def test_blocking_items_match_a_full_scan(main):
+    rnd = random.Random(0)
+    placed = []
+    for i in range(300):
+        x, y, z = rnd.randint(0, 90), rnd.randint(0, 90), rnd.randint(0, 90)
+        placed.append((i, 'item{}'.format(i), (x, y, z), (x + rnd.randint(1, 10), y + rnd.randint(1, 10), z + rnd.randint(1, 10)), 1))
+    stow(main, 'C', placed)
+    items = main.current_stowage_state['C']
+    targets = [items[rnd.randrange(len(items))]['position'] for _ in range(50)]
+    expected = [
+        [i for i, item in enumerate(items)
+         if item['position']['endCoordinates']['height'] <= target['startCoordinates']['height']
+         and item['position']['startCoordinates']['width'] < target['endCoordinates']['width']
+         and item['position']['endCoordinates']['width'] > target['startCoordinates']['width']
+         and item['position']['startCoordinates']['depth'] < target['endCoordinates']['depth']
+         and item['position']['endCoordinates']['depth'] > target['startCoordinates']['depth']]
+        for target in targets
+    ]
+    assert main.find_blocking_items('C', targets) == expected
+
+
+def test_batch_search_matches_single_searches(main):
+    stow(main, 'C', STACK)
+    client = main.app.test_client()
+    batch = client.post('/api/search/batch', json={'itemIds': [3, 99], 'itemNames': ['middle', 'tool']}).get_json()
+    singles = [client.get(url).get_json() for url in ('/api/search?itemId=3', '/api/search?itemId=99', '/api/search?itemName=middle', '/api/search?itemName=tool')]
+    assert [(r['searchKey'], r['searchType']) for r in batch['results']] == [(3, 'itemId'), (99, 'itemId'), ('middle', 'itemName'), ('tool', 'itemName')]
+    for result, single in zip(batch['results'], singles):
+        assert (result['found'], result['item'], result['retrievalSteps']) == (single['found'], single['item'], single['retrievalSteps'])
+
+
+def test_batch_sequence_moves_every_item_once(main):
+    stow(main, 'C', STACK)
+    batch = main.app.test_client().post('/api/search/batch', json={'itemIds': [3, 2, 5]}).get_json()
+    sequence = [(step['action'], step['itemId']) for step in batch['retrievalSequence']]
+    # 2 is in the way of 3 and wanted too, it is taken out rather than put back
+    assert sequence == [
+        ('setAside then placeBack', 1), ('retrieve', 2), ('retrieve', 3),
+        ('setAside then placeBack', 6), ('retrieve', 5),
+    ]
+    assert [step['step'] for step in batch['retrievalSequence']] == [1, 2, 3, 4, 5]
+
+
+def test_batch_search_needs_lists(main):
+    client = main.app.test_client()
+    assert client.post('/api/search/batch', json={'itemIds': 3}).status_code == 400
+    assert client.post('/api/search/batch', json={}).status_code == 400
+
+
+def test_blockers_of_blockers_are_moved_nearest_the_face_first(main):
+    stow(main, 'C', STACK)
+    positions = {item['itemId']: i for i, item in enumerate(main.current_stowage_state['C'])}
+    assert main.retrieval_closures('C', [positions[3], positions[2], positions[4]]) == [(positions[1], positions[2]), (positions[1],), ()]
+
+
+def test_search_picks_the_copy_with_the_least_to_move(main):
+    stow(main, 'C', STACK)
+    client = main.app.test_client()
+    # the copy behind the heavy item needs one move, the other two
+    fewest = client.get('/api/search?itemName=tool').get_json()
+    assert fewest['item']['itemId'] == 5 and moved(fewest) == [6]
+    lightest = client.get('/api/search?itemName=tool&minimize=mass').get_json()
+    assert lightest['item']['itemId'] == 3 and moved(lightest) == [1, 2]
+    assert client.get('/api/search?itemName=tool&minimize=volume').status_code == 400
+
+
+def test_blocking_graph_is_kept_until_the_container_changes(main):
+    stow(main, 'C', STACK)
+    stow(main, 'D', [(7, 'other', (0, 0, 0), (10, 10, 10), 1)])
+    main.find_best_retrieval_option('3', 'itemId')
+    main.find_best_retrieval_option('7', 'itemId')
+    graph = main.retrieval_index_containers['C']['dag']
+    assert graph is not None
+    main.find_best_retrieval_option('tool', 'itemName')
+    assert main.retrieval_index_containers['C']['dag'] is graph
+    main.record_event('placed', [('D', [{'itemId': 8, 'name': 'new', 'containerId': 'D', 'position': box((0, 10, 0), (10, 20, 10))}])])
+    assert main.retrieval_index_containers['C']['dag'] is graph
+    assert main.retrieval_index_containers['D']['dag'] is None
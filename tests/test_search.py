@@ -0,0 +1,69 @@
+import random
+import time
+
+from py3dbp import Packer
+from py3dbp.search import groupedOrder, scorePacking
+
+from conftest import make_bin, make_item
+
+
+def random_packer(seed=0, count=60, bins=2, size=40):
+    ''' an unpacked packer with count random boxes, of two priority levels, for bins size^3 bins '''
+    rnd = random.Random(seed)
+    packer = Packer()
+    for name in range(bins):
+        packer.addBin(make_bin(name, (size, size, size)))
+    for i in range(count):
+        packer.addItem(make_item(i, (rnd.randint(5, 25), rnd.randint(5, 25), rnd.randint(5, 25)), level=rnd.choice((1, 2))))
+    return packer
+
+
+def placements(packer):
+    return [(bin.partno, [(p.partno, p.position, p.rotation_type) for p in bin.items]) for bin in packer.bins]
+
+
+def test_search_places_at_least_what_the_usual_sort_does():
+    usual = random_packer()
+    items = list(usual.items)
+    usual.pack(fix_point=False, check_stable=False)
+    searched = random_packer()
+    searched_items = list(searched.items)
+    score = searched.searchPack(iterations=8, fix_point=False, check_stable=False)
+    levels = [1, 2]
+    assert score >= scorePacking(usual, items, levels)
+    # the packing left is the one scored
+    assert score == scorePacking(searched, searched_items, levels)
+
+
+def test_search_depends_only_on_seed_and_iterations():
+    runs = []
+    for workers in (1, 1, 2):
+        packer = random_packer()
+        packer.searchPack(iterations=4, workers=workers, seed=3, fix_point=False, check_stable=False)
+        runs.append(placements(packer))
+    assert runs[0] == runs[1] == runs[2]
+
+
+def test_orderings_keep_priority_groups():
+    items = [make_item(i, (5, 5, 5), level=level) for i, level in enumerate((2, 1, 2, 1, 3, 1))]
+    rnd = random.Random(0)
+    order = groupedOrder(items, lambda group: rnd.sample(group, len(group)))
+    assert sorted(order) == list(range(len(items)))
+    assert [items[i].level for i in order] == [1, 1, 1, 2, 2, 3]
+
+
+def test_search_stops_at_the_time_limit():
+    packer = random_packer(count=20)
+    score = packer.searchPack(iterations=1000, time_limit=0, fix_point=False, check_stable=False)
+    assert score is None and packer.timed_out
+    # no time to pack anything
+    assert not any(bin.items for bin in packer.bins) and len(packer.unfit_items) == 20
+
+
+def test_search_keeps_to_the_time_limit():
+    # one packing takes about 0.3 s here, the best one is not packed again once the time is up
+    packer = random_packer(count=300, bins=4, size=60)
+    start = time.monotonic()
+    packer.searchPack(iterations=1000, time_limit=0.4, fix_point=False, check_stable=False)
+    assert time.monotonic() - start < 0.6
+    assert any(bin.items for bin in packer.bins)
@@ -0,0 +1,107 @@
+import random
+
+from py3dbp import Packer, Bin
+from py3dbp.auxiliary_methods import intersect
+from py3dbp.spatial_index import SpatialGrid
+
+from conftest import make_bin, make_item
+
+
+def test_grid_finds_boxes_across_cells():
+    grid = SpatialGrid(100, 100, 100)
+    grid.insert(1, (10, 30, 10, 30, 10, 30))
+    grid.insert(2, (60, 90, 0, 100, 0, 20))
+    assert grid.intersects((25, 35, 25, 35, 25, 35))
+    assert grid.intersects((0, 100, 50, 51, 5, 6))
+    assert not grid.intersects((35, 55, 35, 55, 35, 55))
+
+
+def test_grid_clear_drops_every_box():
+    grid = SpatialGrid(100, 100, 100)
+    grid.insert(1, (0, 100, 0, 100, 0, 100))
+    grid.clear()
+    assert not grid.intersects((10, 20, 10, 20, 10, 20))
+
+
+def test_put_item_checks_collisions_through_the_grid():
+    bin = make_bin('bin', (10, 10, 10))
+    first, second = make_item(1, (5, 5, 5)), make_item(2, (5, 5, 5))
+    for item in (first, second):
+        item.formatNumbers(0)
+    assert bin.putItem(first, [0, 0, 0])
+    assert not bin.putItem(second, [2, 2, 2])
+    assert second.position != [2, 2, 2]
+    assert bin.putItem(second, [5, 0, 0])
+
+
+def placed_item(partno, box):
+    ''' an item at box (x0, x1, y0, y1, z0, z1), not rotated '''
+    item = make_item(partno, (box[1] - box[0], box[3] - box[2], box[5] - box[4]))
+    item.position = [box[0], box[2], box[4]]
+    return item
+
+
+def test_grid_agrees_with_brute_force_intersect():
+    rnd = random.Random(0)
+    touching = 0
+    for trial in range(200):
+        # coarse coordinates, so many boxes share a face without overlapping
+        boxes = []
+        for _ in range(rnd.randint(1, 20)):
+            x, y, z = (rnd.randrange(0, 100, 10) for _ in range(3))
+            boxes.append((x, x + rnd.choice([10, 20, 30]), y, y + rnd.choice([10, 20, 30]), z, z + rnd.choice([10, 20, 30])))
+        grid = SpatialGrid(100, 100, 100)
+        for idx, box in enumerate(boxes[1:]):
+            grid.insert(idx, box)
+        candidate = placed_item('candidate', boxes[0])
+        expected = any(intersect(candidate, placed_item(idx, box)) for idx, box in enumerate(boxes[1:]))
+        assert grid.intersects(boxes[0]) == expected, (trial, boxes)
+        touching += any(box[1] == boxes[0][0] or box[0] == boxes[0][1] for box in boxes[1:])
+    assert touching
+
+
+def test_boxes_touching_at_a_face_do_not_collide():
+    grid = SpatialGrid(100, 100, 100)
+    grid.insert(0, (10, 20, 10, 20, 10, 20))
+    for box in ((20, 30, 10, 20, 10, 20), (0, 10, 10, 20, 10, 20), (10, 20, 20, 30, 10, 20), (10, 20, 10, 20, 20, 30)):
+        assert not grid.intersects(box)
+        assert not intersect(placed_item('a', (10, 20, 10, 20, 10, 20)), placed_item('b', box))
+    assert grid.intersects((19, 29, 10, 20, 10, 20))
+
+
+def pack_one_bin(sizes, number_of_decimals=0):
+    ''' the bin of a fix_point pack of boxes of sizes into a 60^3 bin with corners '''
+    packer = Packer()
+    bin = Bin(partno='bin', WHD=(60, 60, 60), max_weight=10000, corner=5)
+    packer.addBin(bin)
+    for i, WHD in enumerate(sizes):
+        packer.addItem(make_item(i, WHD))
+    packer.pack(fix_point=True, check_stable=False, number_of_decimals=number_of_decimals)
+    return bin
+
+
+def placement_boxes(bin):
+    ''' (x0, x1, y0, y1, z0, z1) of every placement in bin, as floats '''
+    boxes = []
+    for p in bin.items:
+        x, y, z = p.position
+        w, h, d = p.getDimension()
+        boxes.append((float(x), float(x + w), float(y), float(y + h), float(z), float(z + d)))
+    return boxes
+
+
+def test_fit_items_and_grid_describe_every_placement():
+    rnd = random.Random(1)
+    bin = pack_one_bin([(rnd.randint(5, 20), rnd.randint(5, 20), rnd.randint(5, 20)) for _ in range(60)])
+    assert bin.fit_items.dtype == float
+    assert sorted(map(tuple, bin.fit_items[1:].tolist())) == sorted(placement_boxes(bin))
+    assert sorted(bin.index.boxes.values()) == sorted(placement_boxes(bin))
+    placed = [placed_item(i, box) for i, box in enumerate(placement_boxes(bin))]
+    assert not any(intersect(a, b) for i, a in enumerate(placed) for b in placed[i + 1:])
+
+
+def test_fix_point_collisions_use_the_rounded_position():
+    rnd = random.Random(2)
+    bin = pack_one_bin([(rnd.randint(50, 200) / 10, rnd.randint(50, 200) / 10, rnd.randint(50, 200) / 10) for _ in range(60)], 1)
+    boxes = placement_boxes(bin)
+    assert sorted(tuple(map(float, box)) for box in bin.index.boxes.values()) == sorted(boxes)
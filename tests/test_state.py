@@ -0,0 +1,119 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from conftest import reset_state
+from test_placement import manifest
+
+
+STATE_NAMES = (
+    'defined_containers', 'zone_wise_containers', 'items_ids_to_place', 'current_stowage_state', 'current_item_state',
+    'item_properties', 'empty_container_ids', 'usage_log', 'activity_log', 'waste_items',
+)
+
+
+def state(main):
+    return {name: getattr(main, name) for name in STATE_NAMES}
+
+
+def place_and_retrieve(main, zones=2, items_per_zone=10):
+    ''' a placement and a retrieval of every placed item, through the API '''
+    containers, items = manifest(zones, items_per_zone)
+    client = main.app.test_client()
+    client.post('/api/placement', json={'items': items, 'containers': containers})
+    for item_id in list(main.current_item_state):
+        client.post('/api/retrieve', json={'itemId': item_id, 'userId': 'test', 'timestamp': '2025-01-01T00:00:00'})
+
+
+def restart(main):
+    ''' a copy of the state as it was, then the state as a new process loads it '''
+    before = {name: value.copy() for name, value in state(main).items()}
+    reset_state(main)
+    main.load_state()
+    return before
+
+
+def test_events_are_replayed_from_the_log(main, monkeypatch, tmp_path):
+    monkeypatch.setattr(main, 'STATE_DIR', str(tmp_path))
+    place_and_retrieve(main)
+    assert main.current_item_state and any(log['total_uses'] for log in main.usage_log.values())
+    before = restart(main)
+    assert state(main) == before
+    assert sorted(os.listdir(tmp_path)) == ['snapshot.pickle', 'wal.pickle']
+
+
+def test_a_record_cut_short_is_dropped(main, monkeypatch, tmp_path):
+    monkeypatch.setattr(main, 'STATE_DIR', str(tmp_path))
+    place_and_retrieve(main)
+    before = restart(main)
+    wal = os.path.join(str(tmp_path), 'wal.pickle')
+    size = os.path.getsize(wal)
+    with open(wal, 'ab') as f:
+        f.write(b'\x80\x05\x95partial')
+    reset_state(main)
+    main.load_state()
+    assert state(main) == before
+    assert os.path.getsize(wal) == size
+
+
+def test_snapshot_is_written_once_the_log_is_big_enough(main, monkeypatch, tmp_path):
+    monkeypatch.setattr(main, 'STATE_DIR', str(tmp_path))
+    place_and_retrieve(main)
+    wal = os.path.join(str(tmp_path), 'wal.pickle')
+    size = os.path.getsize(wal)
+    monkeypatch.setattr(main, 'STATE_SNAPSHOT_BYTES', size)
+    main.add_log('test', 'last', {})
+    # the snapshot is written in the background
+    main.state_snapshot_executor.submit(int).result()
+    assert os.path.getsize(wal) == 0
+    before = restart(main)
+    assert state(main) == before
+
+
+def test_changes_are_logged_while_the_snapshot_is_written(main, monkeypatch, tmp_path):
+    monkeypatch.setattr(main, 'STATE_DIR', str(tmp_path))
+    place_and_retrieve(main, zones=1, items_per_zone=3)
+    writer = threading.Thread(target=main.write_snapshot)
+    writer.start()
+    while not main.state_log['snapshotting']:
+        time.sleep(0.001)
+    main.add_log('test', 'during_snapshot', {})
+    # logged without waiting for the snapshot, which is still being written
+    assert main.state_log['snapshotting']
+    writer.join()
+    wal = os.path.join(str(tmp_path), 'wal.pickle')
+    assert 0 < os.path.getsize(wal) == main.state_log['size']
+    before = restart(main)
+    assert state(main) == before
+    assert main.activity_log[-1]['itemId'] == 'during_snapshot'
+
+
+def test_importing_main_does_not_load_the_state(main, monkeypatch, tmp_path):
+    monkeypatch.setattr(main, 'STATE_DIR', str(tmp_path))
+    place_and_retrieve(main, zones=1, items_per_zone=3)
+    main.state_log['file'].close()
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    loaded = subprocess.run(
+        [sys.executable, '-c', 'import main; print(len(main.current_item_state)); main.start_app(); print(len(main.current_item_state))'],
+        cwd=root, env=dict(os.environ, BAS_STATE_DIR=str(tmp_path), PLACEMENT_WORKERS='1'),
+        check=True, capture_output=True, text=True).stdout.split()
+    assert loaded[0] == '0' and loaded[-1] == str(len(main.current_item_state)) != '0'
+
+
+def test_state_is_loaded_before_the_first_change(main, monkeypatch, tmp_path):
+    monkeypatch.setattr(main, 'STATE_DIR', str(tmp_path))
+    place_and_retrieve(main)
+    before = {name: value.copy() for name, value in state(main).items()}
+    # a server started without start_app, as a WSGI server imports main
+    reset_state(main)
+    main.add_log('test', 'after_restart', {})
+    assert main.activity_log[-1]['itemId'] == 'after_restart'
+    main.activity_log.pop()
+    assert state(main) == before
+    reset_state(main)
+    assert main.app.test_client().get('/api/search?itemName={}'.format(before['item_properties'][1]['name'])).get_json()['found']
+    restart(main)
+    assert main.current_item_state == before['current_item_state']
+    assert 'after_restart' in [log['itemId'] for log in main.activity_log]